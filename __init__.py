@@ -1,6 +1,6 @@
 import bpy
 
-from . import utils, key_utils, cur_utils, magnet, props, ops, ui
+from . import utils, key_utils, cur_utils, slider_tools, magnet, profiler, props, ops, ui
 
 # Addon Info
 bl_info = {
@@ -26,6 +26,10 @@ classes = props.classes + ops.classes + ui.classes
 ##################################
 
 
+def snapshot_handlers():
+    return bpy.app.handlers.undo_post, bpy.app.handlers.redo_post, bpy.app.handlers.load_post
+
+
 def draw_graph_menu(self, context):
     layout = self.layout
     layout.menu('AAT_MT_menu_operators')
@@ -40,9 +44,17 @@ def register():
 
     props.set_props()
 
+    bpy.app.handlers.depsgraph_update_post.append(key_utils.forget_changed_snapshots)
+
+    for handlers in snapshot_handlers():
+        handlers.append(key_utils.clear_snapshots)
+        handlers.append(magnet.forget_anim_transform)
+
 
 def unregister():
 
+    profiler.disable()
+
     for cls in reversed(classes):
         bpy.utils.unregister_class(cls)
 
@@ -53,5 +65,17 @@ def unregister():
     if magnet.anim_transform_handlers in bpy.app.handlers.depsgraph_update_pre:
         bpy.app.handlers.depsgraph_update_pre.remove(magnet.anim_transform_handlers)
 
-    if magnet.anim_trans_mask_handlers in bpy.app.handlers.depsgraph_update_pre:
-        bpy.app.handlers.depsgraph_update_pre.remove(magnet.anim_trans_mask_handlers)
+    magnet.cancel_deferred_transform()
+
+    if key_utils.forget_changed_snapshots in bpy.app.handlers.depsgraph_update_post:
+        bpy.app.handlers.depsgraph_update_post.remove(key_utils.forget_changed_snapshots)
+
+    for handlers in snapshot_handlers():
+        if key_utils.clear_snapshots in handlers:
+            handlers.remove(key_utils.clear_snapshots)
+        if magnet.forget_anim_transform in handlers:
+            handlers.remove(magnet.forget_anim_transform)
+
+    slider_tools.finish_sliced_commit(undo=False)
+
+    key_utils.clear_snapshots()
@@ -0,0 +1,122 @@
+'''
+Compares the old per-key offset of Anim Transform (one "k.co.y" assignment per key) with the bulk
+offset it uses now ("magnet.offset_keys"), on curves of 10k and 100k keys, with and without a mask.
+
+Run it from a Blender session with AnimAide enabled:
+
+    blender --background --python benchmarks/anim_transform_offset.py
+'''
+
+import time
+
+import bpy
+
+import animaide
+from animaide import magnet
+
+REPEAT = 5
+KEY_COUNTS = (10000, 100000)
+
+
+def make_fcurve(action, count):
+    '''
+    Fcurve with "count" keys, one per frame, on a sine wave
+    '''
+
+    fcurve = action.fcurves.new(data_path='location', index=len(action.fcurves))
+    fcurve.keyframe_points.add(count)
+
+    co = [0.0] * (count * 2)
+    for i in range(count):
+        co[i * 2] = i
+        co[i * 2 + 1] = (i % 48) / 48
+
+    fcurve.keyframe_points.foreach_set('co', co)
+    fcurve.update()
+
+    return fcurve
+
+
+def make_mask(mask_curve, count):
+    '''
+    Mask fading in and out over the middle half of the keys
+    '''
+
+    start = count / 4
+    end = count * 3 / 4
+    blend = count / 8
+
+    keys = mask_curve.keyframe_points
+    keys.clear()
+
+    for frame, weight in ((start - blend, 0.0), (start, 1.0), (end, 1.0), (end + blend, 0.0)):
+        keys.insert(frame, weight).interpolation = 'LINEAR'
+
+    mask_curve.update()
+
+
+def per_key_offset(fcurve, delta_y, mask_curve=None):
+    '''
+    What Anim Transform used to do on every update
+    '''
+
+    for k in fcurve.keyframe_points:
+
+        if mask_curve is None:
+            factor = 1
+        else:
+            factor = mask_curve.evaluate(k.co.x)
+
+        k.co.y = k.co.y + (delta_y * factor)
+
+
+def timed(function, *args):
+    '''
+    Milliseconds per call of a function
+    '''
+
+    times = []
+    for i in range(REPEAT):
+        start = time.perf_counter()
+        function(*args)
+        times.append((time.perf_counter() - start) * 1000)
+
+    times.sort()
+
+    return sum(times) / REPEAT, times[0]
+
+
+def main():
+    action = bpy.data.actions.new('animaide_benchmark')
+
+    mask_action = bpy.data.actions.new('animaide_benchmark_mask')
+    mask_curve = mask_action.fcurves.new(data_path='animaide')
+
+    print('AnimAide %s - numpy: %s' % (animaide.bl_info['version'], magnet.np is not None))
+
+    try:
+        for count in KEY_COUNTS:
+            fcurve = make_fcurve(action, count)
+            make_mask(mask_curve, count)
+
+            magnet.mask_table = None
+            old_mean, old_best = timed(per_key_offset, fcurve, 0.01)
+            new_mean, new_best = timed(magnet.offset_keys, fcurve, 0.01)
+
+            old_mask_mean, old_mask_best = timed(per_key_offset, fcurve, 0.01, mask_curve)
+            magnet.compile_mask(mask_curve)
+            new_mask_mean, new_mask_best = timed(magnet.offset_keys, fcurve, 0.01)
+
+            print('%d keys' % count)
+            print('  per-key offset:       %10.3f ms (best %.3f)' % (old_mean, old_best))
+            print('  bulk offset:          %10.3f ms (best %.3f)' % (new_mean, new_best))
+            print('  per-key offset, mask: %10.3f ms (best %.3f)' % (old_mask_mean, old_mask_best))
+            print('  bulk offset, mask:    %10.3f ms (best %.3f)' % (new_mask_mean, new_mask_best))
+
+    finally:
+        magnet.mask_table = None
+        bpy.data.actions.remove(action)
+        bpy.data.actions.remove(mask_action)
+
+
+main()
@@ -0,0 +1,479 @@
+'''
+Lightweight stand-in for the parts of "bpy" AnimAide uses, so the add-on can be imported and timed
+from plain Python (see "run.py"). It only implements what the tools touch: objects, actions,
+fcurves, keyframe points (with "foreach_get" and "foreach_set"), evaluation, property groups and
+the context flags. Keys are evaluated linearly and modifiers are ignored.
+'''
+
+import bisect
+import re
+import sys
+import types
+
+
+# ###### Animation data
+
+
+class Vector:
+    __slots__ = ('x', 'y')
+
+    def __init__(self, x=0.0, y=0.0):
+        self.x = x
+        self.y = y
+
+    def __iter__(self):
+        yield self.x
+        yield self.y
+
+    def __getitem__(self, index):
+        return (self.x, self.y)[index]
+
+    def __len__(self):
+        return 2
+
+
+class Keyframe:
+    def __init__(self, x=0.0, y=0.0):
+        self.co = Vector(x, y)
+        self.handle_left = Vector(x - 1, y)
+        self.handle_right = Vector(x + 1, y)
+        self.handle_left_type = 'AUTO_CLAMPED'
+        self.handle_right_type = 'AUTO_CLAMPED'
+        self.select_control_point = False
+        self.select_left_handle = False
+        self.select_right_handle = False
+        self.interpolation = 'BEZIER'
+        self.easing = 'AUTO'
+
+
+vector_attributes = ('co', 'handle_left', 'handle_right')
+
+# enum values as "foreach_get" gives them
+enum_values = {'interpolation': {'CONSTANT': 0, 'LINEAR': 1, 'BEZIER': 2}}
+
+
+class KeyframePoints:
+    def __init__(self, fcurve):
+        self.fcurve = fcurve
+        self.keys = []
+
+    def __len__(self):
+        return len(self.keys)
+
+    def __iter__(self):
+        return iter(self.keys)
+
+    def __getitem__(self, index):
+        return self.keys[index]
+
+    def items(self):
+        return list(enumerate(self.keys))
+
+    def add(self, count):
+        self.keys.extend(Keyframe() for i in range(count))
+        self.fcurve.frames = None
+
+    def insert(self, frame, value):
+        key = Keyframe(frame, value)
+        index = bisect.bisect_right([k.co.x for k in self.keys], frame)
+        self.keys.insert(index, key)
+        self.fcurve.frames = None
+        return key
+
+    def clear(self):
+        self.keys = []
+        self.fcurve.frames = None
+
+    def foreach_get(self, attribute, sequence):
+        if attribute in vector_attributes:
+            values = [value for key in self.keys for value in getattr(key, attribute)]
+        elif attribute in enum_values:
+            enum = enum_values[attribute]
+            values = [enum.get(getattr(key, attribute), 3) for key in self.keys]
+        else:
+            values = [getattr(key, attribute) for key in self.keys]
+
+        sequence[:len(values)] = values
+
+    def foreach_set(self, attribute, sequence):
+        if attribute in vector_attributes:
+            for index, key in enumerate(self.keys):
+                vector = getattr(key, attribute)
+                vector.x = float(sequence[index * 2])
+                vector.y = float(sequence[index * 2 + 1])
+            self.fcurve.frames = None
+        else:
+            for key, value in zip(self.keys, sequence):
+                setattr(key, attribute, value)
+
+
+class Modifiers(list):
+    def new(self, type):
+        modifier = types.SimpleNamespace(type=type, mode_before='NONE', mode_after='NONE',
+                                         strength=1.0, scale=1.0, phase=0.0)
+        self.append(modifier)
+        return modifier
+
+
+class Group:
+    def __init__(self, name):
+        self.name = name
+        self.lock = False
+        self.color_set = 'DEFAULT'
+
+
+class Groups(dict):
+    def __getitem__(self, name):
+        if name not in self:
+            dict.__setitem__(self, name, Group(name))
+        return dict.__getitem__(self, name)
+
+
+class FCurve:
+    def __init__(self, action, data_path='', index=0, group=None):
+        self.id_data = action
+        self.data_path = data_path
+        self.array_index = index
+        self.group = group
+        self.keyframe_points = KeyframePoints(self)
+        self.modifiers = Modifiers()
+        self.select = True
+        self.lock = False
+        self.hide = False
+        self.mute = False
+        self.color_mode = 'AUTO_RAINBOW'
+        self.color = (0, 0, 0)
+        self.frames = None      # frames of the keys, for "evaluate"
+
+    def update(self):
+        keys = self.keyframe_points.keys
+        keys.sort(key=lambda key: key.co.x)
+        count = len(keys)
+
+        for index, key in enumerate(keys):
+            if key.handle_left_type in ('FREE', 'ALIGNED'):
+                continue
+            previous = keys[index - 1] if index > 0 else key
+            following = keys[index + 1] if index < count - 1 else key
+            span = following.co.x - previous.co.x
+            slope = (following.co.y - previous.co.y) / span if span else 0.0
+            left = (key.co.x - previous.co.x) / 3 or 1 / 3
+            right = (following.co.x - key.co.x) / 3 or 1 / 3
+            key.handle_left.x = key.co.x - left
+            key.handle_left.y = key.co.y - slope * left
+            key.handle_right.x = key.co.x + right
+            key.handle_right.y = key.co.y + slope * right
+
+        self.frames = None
+
+    def evaluate(self, frame):
+        keys = self.keyframe_points.keys
+
+        if not keys:
+            return 0.0
+
+        if self.frames is None:
+            self.frames = [key.co.x for key in keys]
+
+        frames = self.frames
+
+        if frame <= frames[0]:
+            return keys[0].co.y
+        if frame >= frames[-1]:
+            return keys[-1].co.y
+
+        index = bisect.bisect_right(frames, frame) - 1
+        left = keys[index]
+        right = keys[index + 1]
+        ratio = (frame - left.co.x) / (right.co.x - left.co.x)
+
+        return left.co.y + (right.co.y - left.co.y) * ratio
+
+
+class FCurves:
+    def __init__(self, action):
+        self.id_data = action
+        self.curves = []
+
+    def __len__(self):
+        return len(self.curves)
+
+    def __iter__(self):
+        return iter(self.curves)
+
+    def __getitem__(self, index):
+        return self.curves[index]
+
+    def __bool__(self):
+        return bool(self.curves)
+
+    def items(self):
+        return list(enumerate(self.curves))
+
+    def new(self, data_path, index=0, action_group=''):
+        group = self.id_data.groups[action_group] if action_group else None
+        fcurve = FCurve(self.id_data, data_path, index, group)
+        self.curves.append(fcurve)
+        return fcurve
+
+    def find(self, data_path, index=0):
+        for fcurve in self.curves:
+            if fcurve.data_path == data_path and fcurve.array_index == index:
+                return fcurve
+        return None
+
+    def remove(self, fcurve):
+        self.curves.remove(fcurve)
+
+
+class ID:
+    def __init__(self, name):
+        self.name = name
+        self.name_full = name
+
+    def as_pointer(self):
+        return id(self)
+
+    def update_tag(self):
+        pass
+
+
+class Action(ID):
+    def __init__(self, name):
+        ID.__init__(self, name)
+        self.groups = Groups()
+        self.fcurves = FCurves(self)
+
+
+# ###### Objects
+
+
+class Bone:
+    def __init__(self, name, parent=None):
+        self.name = name
+        self.hide = False
+        self.select = True
+        self.parent = parent
+        self.children = []
+
+        if parent is not None:
+            parent.children.append(self)
+
+
+class Bones(dict):
+    '''
+    Collection of bones by name that iterates over the bones like Blender collections do
+    '''
+
+    def __iter__(self):
+        return iter(list(self.values()))
+
+
+class PoseBone:
+    def __init__(self, name):
+        self.name = name
+        self.location = [0.0, 0.0, 0.0]
+        self.rotation_quaternion = [1.0, 0.0, 0.0, 0.0]
+        self.rotation_euler = [0.0, 0.0, 0.0]
+        self.scale = [1.0, 1.0, 1.0]
+
+
+# "name", '["key"]' and "[index]" parts of a data_path
+path_tokens = re.compile(r'\.?(\w+)|\["([^"]*)"\]|\[(\d+)\]')
+
+
+class Object(ID):
+    def __init__(self, name, type='EMPTY'):
+        ID.__init__(self, name)
+        self.type = type
+        self.animation_data = types.SimpleNamespace(action=None)
+        self.data = ID(name)
+        self.data.bones = Bones()
+        self.pose = types.SimpleNamespace(bones={})
+        self.location = [0.0, 0.0, 0.0]
+        self.rotation_euler = [0.0, 0.0, 0.0]
+        self.rotation_quaternion = [1.0, 0.0, 0.0, 0.0]
+        self.scale = [1.0, 1.0, 1.0]
+        self.properties = {}
+        self.visible = True
+
+    def visible_get(self):
+        return self.visible
+
+    def __getitem__(self, key):
+        return self.properties[key]
+
+    def path_resolve(self, path):
+        value = self
+        position = 0
+
+        while position < len(path):
+            match = path_tokens.match(path, position)
+            if match is None:
+                raise ValueError('Path "%s" could not be resolved' % path)
+
+            name, key, index = match.groups()
+            try:
+                if name is not None:
+                    value = getattr(value, name)
+                elif key is not None:
+                    value = value[key]
+                else:
+                    value = value[int(index)]
+            except (AttributeError, KeyError, IndexError):
+                raise ValueError('Path "%s" could not be resolved' % path)
+
+            position = match.end()
+
+        return value
+
+
+# ###### Property groups
+
+
+def instantiate(cls):
+    '''
+    Instance of a PropertyGroup subclass with the defaults of its properties
+    '''
+
+    instance = cls()
+
+    for name, value in getattr(cls, '__annotations__', {}).items():
+        kind, kwargs = value
+
+        if kind == 'PointerProperty':
+            value = instantiate(kwargs['type'])
+        elif kind == 'CollectionProperty':
+            value = []
+        elif 'default' in kwargs:
+            value = kwargs['default']
+        elif kind == 'EnumProperty':
+            value = kwargs['items'][0][0]
+        else:
+            value = {'StringProperty': '', 'BoolProperty': False, 'IntProperty': 0,
+                     'FloatProperty': 0.0}.get(kind)
+
+        setattr(instance, name, value)
+
+    return instance
+
+
+# ###### Module
+
+
+class DataCollection(dict):
+    '''
+    "bpy.data" collection of IDs by name
+    '''
+
+    def __init__(self, kind):
+        dict.__init__(self)
+        self.kind = kind
+
+    def __iter__(self):
+        return iter(list(self.values()))
+
+    def new(self, name):
+        item = self[name] = self.kind(name)
+        return item
+
+    def remove(self, item):
+        del self[item.name]
+
+
+def make_module():
+    '''
+    New "bpy" module
+    '''
+
+    bpy = types.ModuleType('bpy')
+
+    bpy.props = types.ModuleType('bpy.props')
+    for name in ('StringProperty', 'BoolProperty', 'EnumProperty', 'IntProperty', 'FloatProperty',
+                 'PointerProperty', 'CollectionProperty', 'FloatVectorProperty'):
+        def prop(kind=name, **kwargs):
+            return kind, kwargs
+        setattr(bpy.props, name, prop)
+
+    bpy.types = types.ModuleType('bpy.types')
+    for name in ('PropertyGroup', 'AddonPreferences', 'Operator', 'Panel', 'Menu', 'UIList'):
+        setattr(bpy.types, name, type(name, (), {}))
+    bpy.types.Action = Action
+    bpy.types.Object = Object
+    bpy.types.GRAPH_MT_key = types.SimpleNamespace(append=lambda function: None,
+                                                   remove=lambda function: None)
+
+    bpy.utils = types.SimpleNamespace(register_class=lambda cls: None, unregister_class=lambda cls: None)
+
+    timers = []
+    bpy.app = types.ModuleType('bpy.app')
+    bpy.app.version = (2, 90, 0)
+    bpy.app.timers = types.SimpleNamespace(register=lambda function, **kwargs: timers.append(function),
+                                           unregister=timers.remove,
+                                           is_registered=lambda function: function in timers,
+                                           registered=timers)
+
+    bpy.app.handlers = types.ModuleType('bpy.app.handlers')
+    bpy.app.handlers.persistent = lambda function: function
+    for name in ('depsgraph_update_pre', 'depsgraph_update_post', 'load_pre', 'load_post',
+                 'undo_pre', 'undo_post', 'redo_pre', 'redo_post'):
+        setattr(bpy.app.handlers, name, [])
+
+    bpy.ops = types.SimpleNamespace(ed=types.SimpleNamespace(undo_push=lambda message='': None))
+    bpy.data = types.SimpleNamespace(objects=DataCollection(Object), actions=DataCollection(Action))
+    bpy.context = None
+
+    return bpy
+
+
+def install():
+    '''
+    Makes "import bpy" give the stand-in
+    '''
+
+    bpy = make_module()
+
+    sys.modules['bpy'] = bpy
+    sys.modules['bpy.props'] = bpy.props
+    sys.modules['bpy.types'] = bpy.types
+    sys.modules['bpy.app'] = bpy.app
+    sys.modules['bpy.app.handlers'] = bpy.app.handlers
+
+    return bpy
+
+
+def make_context(bpy, scene_props, objects, selected=None):
+    '''
+    Context of a Graph Editor showing "objects". "scene_props" is the "AnimAideScene" class
+    '''
+
+    scene = types.SimpleNamespace(
+        name='Scene',
+        animaide=instantiate(scene_props),
+        frame_current=0,
+        objects=list(objects),
+        timeline_markers={},
+        tool_settings=types.SimpleNamespace(use_keyframe_insert_auto=False))
+
+    depsgraph = types.SimpleNamespace(id_type_updated=lambda id_type: True)
+
+    context = types.SimpleNamespace(
+        scene=scene,
+        selected_objects=list(objects if selected is None else selected),
+        space_data=types.SimpleNamespace(
+            dopesheet=types.SimpleNamespace(show_only_selected=True, show_hidden=False)),
+        area=types.SimpleNamespace(type='GRAPH_EDITOR', tag_redraw=lambda: None,
+                                   header_text_set=lambda text: None, regions=[]),
+        view_layer=types.SimpleNamespace(depsgraph=depsgraph),
+        window=None,
+        window_manager=types.SimpleNamespace(operators=[], windows=[],
+                                             modal_handler_add=lambda operator: None,
+                                             event_timer_add=lambda interval, window=None: object(),
+                                             event_timer_remove=lambda timer: None))
+
+    bpy.context = context
+
+    for obj in objects:
+        bpy.data.objects[obj.name] = obj
+
+    return context
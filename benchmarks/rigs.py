@@ -0,0 +1,100 @@
+'''
+Synthetic animated objects for the benchmarks, built with the "bpy" stand-in
+'''
+
+import math
+import random
+
+import bpy_standin
+
+# channels animated on every bone (or object) and the number of fcurves of each
+channels = (('location', 3), ('rotation_quaternion', 4), ('scale', 3))
+
+
+def add_fcurve(action, data_path, index, key_count, rnd, selected_ratio, group=''):
+    '''
+    Fcurve with "key_count" keys (one every 2 frames) following a noisy wave. A block of keys in the
+    middle of the curve is selected
+    '''
+
+    fcurve = action.fcurves.new(data_path, index=index, action_group=group)
+    keys = fcurve.keyframe_points
+    keys.add(key_count)
+
+    phase = rnd.uniform(0, math.pi * 2)
+    co = []
+    for i in range(key_count):
+        co.append(i * 2.0)
+        co.append(math.sin(i / 8 + phase) + rnd.uniform(-0.1, 0.1))
+
+    keys.foreach_set('co', co)
+
+    selected_count = int(key_count * selected_ratio)
+    first = (key_count - selected_count) // 2
+    for key in keys.keys[first:first + selected_count]:
+        key.select_control_point = True
+
+    fcurve.update()
+
+    return fcurve
+
+
+def make_object(name, key_count, selected_ratio=0.5, seed=0):
+    '''
+    Object with its transforms animated
+    '''
+
+    rnd = random.Random(seed)
+
+    obj = bpy_standin.Object(name)
+    action = bpy_standin.Action('%sAction' % name)
+    obj.animation_data.action = action
+
+    for data_path, count in channels:
+        for index in range(count):
+            add_fcurve(action, data_path, index, key_count, rnd, selected_ratio, group='Object Transforms')
+
+    return obj
+
+
+def make_rig(name, bone_count, key_count, selected_ratio=0.5, seed=0):
+    '''
+    Armature with a chain of "bone_count" bones, all of them animated
+    '''
+
+    rnd = random.Random(seed)
+
+    obj = bpy_standin.Object(name, type='ARMATURE')
+    action = bpy_standin.Action('%sAction' % name)
+    obj.animation_data.action = action
+
+    parent = None
+    for bone_index in range(bone_count):
+        bone_name = 'Bone.%03d' % bone_index
+        bone = bpy_standin.Bone(bone_name, parent)
+        obj.data.bones[bone_name] = bone
+        obj.pose.bones[bone_name] = bpy_standin.PoseBone(bone_name)
+        parent = bone
+
+        for data_path, count in channels:
+            for index in range(count):
+                add_fcurve(action, 'pose.bones["%s"].%s' % (bone_name, data_path), index,
+                           key_count, rnd, selected_ratio, group=bone_name)
+
+    return obj
+
+
+def make_scene(rig_count=1, object_count=1, bone_count=20, key_count=500, selected_ratio=0.5, seed=0):
+    '''
+    Rigs and objects for a benchmark
+    '''
+
+    objects = []
+
+    for i in range(rig_count):
+        objects.append(make_rig('Rig.%03d' % i, bone_count, key_count, selected_ratio, seed + i))
+
+    for i in range(object_count):
+        objects.append(make_object('Object.%03d' % i, key_count, selected_ratio, seed + rig_count + i))
+
+    return objects
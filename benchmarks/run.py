@@ -0,0 +1,331 @@
+'''
+Times the sliders and Anim Transform from plain Python, with "bpy_standin" in place of Blender and
+synthetic rigs from "rigs". Nothing has to be installed besides numpy (optional, as in Blender):
+
+    python benchmarks/run.py --bones 20 --keys 500 --output results.json
+
+Every run writes its timings (in milliseconds) to a JSON file, "benchmarks/benchmark_results.json"
+unless "--output" is given. Two of them can be compared with:
+
+    python benchmarks/run.py --compare before.json after.json
+
+The stand-in keeps keys as Python objects, so absolute numbers are not the ones you get in Blender;
+use them to compare commits run with the same options.
+'''
+
+import argparse
+import importlib.util
+import json
+import os
+import platform
+import subprocess
+import sys
+import time
+import types
+
+import bpy_standin
+
+bpy = bpy_standin.install()
+
+import rigs
+
+root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# factors the sliders go through, one per tick
+factors = (-0.8, -0.4, 0.1, 0.5, 0.9)
+
+
+def load_addon():
+    '''
+    Imports the add-on as the "animaide" package whatever the name of its folder
+    '''
+
+    spec = importlib.util.spec_from_file_location('animaide', os.path.join(root, '__init__.py'),
+                                                  submodule_search_locations=[root])
+    addon = importlib.util.module_from_spec(spec)
+    sys.modules['animaide'] = addon
+    spec.loader.exec_module(addon)
+
+    return addon
+
+
+def get_commit():
+    try:
+        return subprocess.check_output(['git', 'rev-parse', '--short', 'HEAD'], cwd=root,
+                                       stderr=subprocess.DEVNULL).decode().strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def summary(times):
+    '''
+    Statistics of a list of durations in seconds, as milliseconds
+    '''
+
+    times = sorted(time * 1000 for time in times)
+    count = len(times)
+
+    return {'runs': count,
+            'mean_ms': sum(times) / count,
+            'min_ms': times[0],
+            'p50_ms': times[count // 2],
+            'p90_ms': times[min(int(count * 0.9), count - 1)],
+            'max_ms': times[-1]}
+
+
+def timed(function, repeat):
+    '''
+    Durations of "repeat" calls of a function. It gets the number of the call
+    '''
+
+    times = []
+
+    for i in range(repeat):
+        start = time.perf_counter()
+        function(i)
+        times.append(time.perf_counter() - start)
+
+    return times
+
+
+def make_operator(slider_type):
+    '''
+    What the slider operators keep between calls
+    '''
+
+    return types.SimpleNamespace(slider_type=slider_type, slot_index=-1, op_context='INVOKE_DEFAULT',
+                                 factor=0.0, slope=2.0, plan=None, preview_plan=None,
+                                 defer_update=False, settings=None)
+
+
+# ###### Benchmarks
+
+
+def plan_coverage(addon, context):
+    '''
+    Fcurves and keys the sliders change, to check that the benchmarks go over all the objects
+    '''
+
+    key_utils = addon.key_utils
+    slider_tools = addon.slider_tools
+
+    slider = context.scene.animaide.slider
+    operator = make_operator('EASE_TO_EASE')
+    operator.settings = key_utils.get_settings(context)
+
+    key_utils.get_sliders_globals(left_frame=slider.left_ref_frame, right_frame=slider.right_ref_frame,
+                                  settings=operator.settings)
+    plan = slider_tools.get_plan(operator, context)
+
+    return {'fcurves': len(plan),
+            'actions': len({item.fcurve.id_data.name for item in plan}),
+            'keys': sum(len(item.snapshot.selected_keys) for item in plan)}
+
+
+def bench_sliders(addon, context, repeat):
+    '''
+    Snapshot, every slider per tick and cancel (restore)
+    '''
+
+    key_utils = addon.key_utils
+    slider_tools = addon.slider_tools
+
+    slider = context.scene.animaide.slider
+    settings = key_utils.get_settings(context)
+
+    results = {}
+
+    def snapshot(i, cached=False):
+        if not cached:
+            key_utils.clear_snapshots()
+        key_utils.get_sliders_globals(left_frame=slider.left_ref_frame, right_frame=slider.right_ref_frame,
+                                      settings=settings)
+
+    results['snapshot'] = summary(timed(snapshot, repeat))
+
+    # nothing changed since the last snapshot
+    results['snapshot cached'] = summary(timed(lambda i: snapshot(i, cached=True), repeat))
+
+    restore_times = []
+
+    for slider_type in slider_tools.sliders:
+        operator = make_operator(slider_type)
+        operator.settings = settings
+        operator.plan = slider_tools.get_plan(operator, context)
+
+        def tick(i):
+            operator.factor = factors[i % len(factors)]
+            slider_tools.looper(operator, context)
+
+        results['slider %s' % slider_type] = summary(timed(tick, repeat))
+
+        restore_times += timed(lambda i: slider_tools.restore_plan(operator.plan), 1)
+
+    results['cancel'] = summary(restore_times)
+
+    # preview with a fifth of the frames in view
+    operator = make_operator('EASE_TO_EASE')
+    operator.settings = settings
+    operator.plan = slider_tools.get_plan(operator, context)
+
+    frames = [frame for item in operator.plan for frame in (item.snapshot.x[0], item.snapshot.x[-1])]
+    start, end = min(frames), max(frames)
+    middle = (start + end) / 2
+    operator.preview_plan = slider_tools.get_visible_plan(operator.plan, middle - (end - start) / 10,
+                                                          middle + (end - start) / 10)
+
+    def preview_tick(i):
+        operator.factor = factors[i % len(factors)]
+        slider_tools.looper(operator, context)
+
+    results['slider EASE_TO_EASE preview'] = summary(timed(preview_tick, repeat))
+
+    slider_tools.restore_plan(operator.preview_plan)
+
+    # fcurves updated only on release. The release itself costs one tick of "slider EASE_TO_EASE"
+    operator.preview_plan = None
+    operator.defer_update = True
+
+    results['slider EASE_TO_EASE on release'] = summary(timed(preview_tick, repeat))
+    results['cancel on release'] = summary(timed(lambda i: slider_tools.restore_plan(operator.plan, update=False),
+                                                 1))
+
+    return results
+
+
+def add_mask(addon, key_count):
+    '''
+    Anim Transform mask over the middle of the keys
+    '''
+
+    action = bpy.data.actions.new('animaide')
+    mask = action.fcurves.new('animaide', index=0, action_group='Magnet')
+
+    middle = key_count
+    for frame, weight in ((middle - 40, 0.0), (middle - 10, 1.0), (middle + 10, 1.0), (middle + 40, 0.0)):
+        mask.keyframe_points.insert(frame, weight)
+
+    addon.magnet.compile_mask(mask)
+
+
+def bench_anim_transform(addon, context, objects, repeat, key_count):
+    '''
+    One Anim Transform update after moving every object and bone, with and without mask
+    '''
+
+    magnet = addon.magnet
+    scene = context.scene
+
+    def move(i):
+        offset = 0.01 * (i + 1)
+        for obj in objects:
+            obj.location[0] += offset
+            for pose_bone in obj.pose.bones.values():
+                pose_bone.location[0] += offset
+
+    def update(i):
+        move(i)
+        magnet.anim_transform_handlers(scene)
+
+    results = {}
+
+    magnet.last_values.clear()
+    magnet.mask_table = None
+
+    # the first update records the value of every channel
+    magnet.anim_transform_handlers(scene)
+
+    results['anim_transform'] = summary(timed(update, repeat))
+
+    add_mask(addon, key_count)
+    results['anim_transform mask'] = summary(timed(update, repeat))
+
+    # an update where nothing moved
+    results['anim_transform idle'] = summary(timed(lambda i: magnet.anim_transform_handlers(scene), repeat))
+
+    return results
+
+
+# ###### Main
+
+
+def compare(before_path, after_path):
+    with open(before_path) as file:
+        before = json.load(file)
+    with open(after_path) as file:
+        after = json.load(file)
+
+    print('%-32s %12s %12s %8s' % ('', before.get('commit') or 'before', after.get('commit') or 'after', 'ratio'))
+
+    for name, stats in after['results'].items():
+        old = before['results'].get(name)
+        if old is None:
+            print('%-32s %12s %12.3f' % (name, '-', stats['mean_ms']))
+            continue
+        ratio = stats['mean_ms'] / old['mean_ms'] if old['mean_ms'] else 0.0
+        print('%-32s %12.3f %12.3f %7.2fx' % (name, old['mean_ms'], stats['mean_ms'], ratio))
+
+
+def main():
+    parser = argparse.ArgumentParser(description='AnimAide benchmarks without Blender')
+    parser.add_argument('--rigs', type=int, default=1, help='armatures in the scene')
+    parser.add_argument('--objects', type=int, default=1, help='animated objects in the scene')
+    parser.add_argument('--bones', type=int, default=20, help='bones per armature (10 fcurves each)')
+    parser.add_argument('--keys', type=int, default=500, help='keys per fcurve')
+    parser.add_argument('--selected', type=float, default=0.5, help='part of the keys selected')
+    parser.add_argument('--repeat', type=int, default=10, help='calls timed per benchmark')
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--no-numpy', action='store_true', help='time the code used without numpy')
+    parser.add_argument('--output', default=os.path.join(root, 'benchmarks', 'benchmark_results.json'),
+                        help='JSON file for the results')
+    parser.add_argument('--compare', nargs=2, metavar=('BEFORE', 'AFTER'), help='compare two result files')
+    args = parser.parse_args()
+
+    if args.compare:
+        compare(*args.compare)
+        return
+
+    addon = load_addon()
+
+    if args.no_numpy:
+        for module in (addon.key_utils, addon.curve_math, addon.slider_tools, addon.magnet):
+            module.np = None
+
+    objects = rigs.make_scene(args.rigs, args.objects, args.bones, args.keys, args.selected, args.seed)
+    context = bpy_standin.make_context(bpy, addon.props.AnimAideScene, objects)
+
+    slider = context.scene.animaide.slider
+    slider.left_ref_frame = 10
+    slider.right_ref_frame = args.keys * 2 - 10
+    context.scene.frame_current = args.keys
+
+    coverage = plan_coverage(addon, context)
+
+    results = {}
+    results.update(bench_sliders(addon, context, args.repeat))
+    results.update(bench_anim_transform(addon, context, objects, args.repeat, args.keys))
+
+    numpy = addon.key_utils.np
+
+    data = {'commit': get_commit(),
+            'date': time.strftime('%Y-%m-%d %H:%M:%S'),
+            'python': platform.python_version(),
+            'numpy': None if numpy is None else numpy.__version__,
+            'config': {name: value for name, value in vars(args).items() if name not in ('output', 'compare')},
+            'fcurves': sum(len(obj.animation_data.action.fcurves) for obj in objects),
+            'plan': coverage,
+            'results': results}
+
+    with open(args.output, 'w') as file:
+        json.dump(data, file, indent=2)
+
+    for name, stats in results.items():
+        print('%-32s %10.3f ms (p90 %.3f)' % (name, stats['mean_ms'], stats['p90_ms']))
+
+    print('Sliders applied to %d of %d fcurves (%d actions, %d keys)'
+          % (coverage['fcurves'], data['fcurves'], coverage['actions'], coverage['keys']))
+    print('Results saved to %s' % args.output)
+
+
+if __name__ == '__main__':
+    main()
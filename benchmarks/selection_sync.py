@@ -0,0 +1,94 @@
+'''
+Compares the old selection refresh of the sliders (a full "bpy.ops.transform.transform()" in the
+Graph Editor) with reading the key selection in bulk, which is what the sliders do now.
+
+Run it from a Blender session with AnimAide enabled and a Graph Editor open, after selecting
+some animated objects and keys:
+
+    blender my_file.blend --python benchmarks/selection_sync.py
+'''
+
+import time
+
+import bpy
+
+import animaide
+from animaide import key_utils
+
+REPEAT = 50
+
+
+def graph_editor_override():
+    '''
+    Context override pointing to the first Graph Editor found
+    '''
+
+    for window in bpy.context.window_manager.windows:
+        for area in window.screen.areas:
+            if area.type != 'GRAPH_EDITOR':
+                continue
+            for region in area.regions:
+                if region.type == 'WINDOW':
+                    return {'window': window, 'screen': window.screen, 'area': area, 'region': region}
+
+    return None
+
+
+def transform_refresh(override):
+    '''
+    The refresh the sliders used to run on every step button click
+    '''
+
+    if hasattr(bpy.context, 'temp_override'):
+        with bpy.context.temp_override(**override):
+            bpy.ops.transform.transform()
+    else:
+        bpy.ops.transform.transform(override)
+
+
+def selection_sync(fcurves):
+    '''
+    What the sliders do now: read the selection straight from the keys
+    '''
+
+    for fcurve in fcurves:
+        key_utils.get_selection(fcurve)
+
+
+def timed(function, *args):
+    '''
+    Milliseconds per call of a function
+    '''
+
+    times = []
+    for i in range(REPEAT):
+        start = time.perf_counter()
+        function(*args)
+        times.append((time.perf_counter() - start) * 1000)
+
+    times.sort()
+
+    return sum(times) / REPEAT, times[0]
+
+
+def main():
+    override = graph_editor_override()
+    if override is None:
+        print('A Graph Editor has to be open to run this benchmark')
+        return
+
+    fcurves = [fcurve
+               for obj in bpy.context.selected_objects if key_utils.valid_anim(obj)
+               for fcurve in obj.animation_data.action.fcurves]
+    keys = sum(len(fcurve.keyframe_points) for fcurve in fcurves)
+
+    old_mean, old_best = timed(transform_refresh, override)
+    new_mean, new_best = timed(selection_sync, fcurves)
+
+    print('AnimAide %s - %d fcurves, %d keys' % (animaide.bl_info['version'], len(fcurves), keys))
+    print('transform refresh: %8.3f ms per click (best %.3f)' % (old_mean, old_best))
+    print('selection sync:    %8.3f ms per click (best %.3f)' % (new_mean, new_best))
+    print('saved:             %8.3f ms per click' % (old_mean - new_mean))
+
+
+main()
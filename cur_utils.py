@@ -56,11 +56,10 @@ def duplicate_from_data(fcurves, global_fcurve, new_data_path, before='NONE', af
     """
 
     index = len(fcurves)
-    every_key = global_fcurve['every_key']
-    original_values = global_fcurve['original_values']
+    count = len(global_fcurve.x)
 
     dup = fcurves.new(data_path=new_data_path, index=index, action_group=group_name)
-    dup.keyframe_points.add(len(every_key))
+    dup.keyframe_points.add(count)
     dup.color_mode = 'CUSTOM'
     dup.color = (0, 0, 0)
 
@@ -71,24 +70,13 @@ def duplicate_from_data(fcurves, global_fcurve, new_data_path, before='NONE', af
     action.groups[group_name].lock = lock
     action.groups[group_name].color_set = 'THEME10'
 
-    i = 0
-
-    for index in every_key:
-        original_key = original_values[index]
-        dup.keyframe_points[i].co.x = original_key['x']
-        dup.keyframe_points[i].co.y = original_key['y']
-
-        i += 1
+    co = [0.0] * (count * 2)
+    co[0::2] = global_fcurve.x
+    co[1::2] = global_fcurve.y
+    dup.keyframe_points.foreach_set('co', co)
 
     add_cycle(dup, before=before, after=after)
 
     dup.update()
 
     return dup
-
-
-def s_curve(x, slope=1.0, width=1.0, height=1.0, xshift=0.0, yshift=0.0):
-    '''
-    Formula for "s" curve
-    '''
-    return height * ((x - xshift) ** slope / ((x - xshift) ** slope + (width - (x - xshift)) ** slope)) + yshift
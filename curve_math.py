@@ -0,0 +1,454 @@
+'''
+Math of the sliders without Blender. Nothing in here reads or writes keys: the functions get the
+values of the keys as numpy arrays and return new ones, so they can be used (and timed) on any data.
+"slider_tools" gets the arrays from the fcurves and writes the results back. Without numpy it calls
+the slider kernels (all but "time_offset") once per key, with numbers instead of arrays.
+
+Slider kernels all take the same first arguments:
+x, y: frame and original value of the keys to modify
+factor: position of the slider
+left, right: the keys around the modified ones as {'x': frame, 'y': value}
+limits: (min_value, max_value) allowed for the factor
+and return the new "y" of the keys.
+'''
+
+import math
+
+from collections import OrderedDict
+from functools import partial
+
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
+# value of the "interpolation" of the keys as Blender stores it. Other interpolations are evaluated as linear
+interpolations = {'CONSTANT': 0, 'LINEAR': 1, 'BEZIER': 2}
+
+
+def clamp(value, minimum, maximum):
+    return min(max(value, minimum), maximum)
+
+
+def s_curve(x, slope=1.0, width=1.0, height=1.0, xshift=0.0, yshift=0.0):
+    '''
+    Formula for "s" curve. Works on numbers and on numpy arrays. The curve stays flat before 0 and
+    after "width", so the powers never get a negative base and the result is always real
+    '''
+    position = x - xshift
+
+    if np is not None and isinstance(position, np.ndarray):
+        position = np.clip(position, 0.0, width)
+        rise = position ** slope
+        total = rise + (width - position) ** slope
+        return height * np.divide(rise, total, out=np.full_like(total, 0.5), where=total > 0) + yshift
+
+    position = clamp(position, 0.0, width)
+    rise = position ** slope
+    total = rise + (width - position) ** slope
+
+    return height * (rise / total if total else 0.5) + yshift
+
+
+# ###### S curve tables
+# While sliding, "ease_to_ease" and "blend_ease" use the same slope on every tick. With "tabulated"
+# they read the curve from a table made once per slope instead of calculating the powers for every
+# key. "ease" changes its slope with the factor, so it always uses the formula
+
+table_size = 4097
+
+# {slope: SCurveTable}, the least recently used first
+s_curve_tables = OrderedDict()
+max_tables = 64
+
+
+class SCurveTable:
+    '''
+    "s_curve" of one slope sampled between 0 and 1. It is called like "s_curve" and interpolates
+    into the table, for any width, height and shift
+    '''
+
+    __slots__ = ('slope', 'samples', 'values')
+
+    def __init__(self, slope, size=table_size):
+        self.slope = slope
+        self.samples = np.linspace(0.0, 1.0, size)
+        self.values = s_curve(self.samples, slope=slope)
+
+    def __call__(self, x, width=1.0, height=1.0, xshift=0.0, yshift=0.0):
+        return height * np.interp((x - xshift) / width, self.samples, self.values) + yshift
+
+
+def get_s_curve(slope, tabulated=False):
+    '''
+    "s_curve" for one slope: the formula, or its table if "tabulated" (and numpy is available)
+    '''
+
+    if not tabulated or np is None:
+        return partial(s_curve, slope=slope)
+
+    table = s_curve_tables.get(slope)
+
+    if table is None:
+        if len(s_curve_tables) >= max_tables:
+            s_curve_tables.popitem(last=False)
+        table = s_curve_tables[slope] = SCurveTable(slope)
+    else:
+        s_curve_tables.move_to_end(slope)
+
+    return table
+
+
+def key_ratio(x, left, right):
+    '''
+    Relative position of the keys between the left and right neighbors
+    '''
+    local_x = right['x'] - left['x']
+
+    if local_x == 0:
+        return x * 0.0
+
+    return (x - left['x']) / local_x
+
+
+# ###### Slider kernels
+
+
+def ease_to_ease(x, y, factor, left, right, limits, slope, tabulated=False):
+    clamped_factor = clamp(-factor, *limits)
+
+    local_y = right['y'] - left['y']
+    ratio = key_ratio(x, left, right)
+
+    if np is not None and isinstance(ratio, np.ndarray):
+        clamped_move = np.clip(clamped_factor, ratio - 1, ratio)
+    else:
+        clamped_move = clamp(clamped_factor, ratio - 1, ratio)
+
+    ease_y = get_s_curve(slope, tabulated)(ratio, xshift=clamped_move)
+
+    return left['y'] + local_y * ease_y
+
+
+def ease(x, y, factor, left, right, limits, slope):
+    clamped_factor = clamp(factor, *limits)
+
+    local_y = right['y'] - left['y']
+    ratio = key_ratio(x, left, right)
+
+    new_slope = 1 + ((slope * 2) * abs(clamped_factor))
+
+    if factor < 0:
+        shift = 0
+    else:
+        shift = -1
+
+    ease_y = s_curve(ratio, slope=new_slope, width=2, height=2, xshift=shift, yshift=shift)
+
+    return left['y'] + local_y * ease_y
+
+
+def blend_neighbor(x, y, factor, left, right, limits):
+    if factor < 0:
+        target_y = left['y']
+    else:
+        target_y = right['y']
+
+    clamped_factor = clamp(abs(factor), 0, limits[1])
+
+    return y + (target_y - y) * clamped_factor
+
+
+def blend_frame(x, y, factor, left, right, limits, left_y_ref, right_y_ref):
+    if factor < 0:
+        target_y = left_y_ref
+    else:
+        target_y = right_y_ref
+
+    clamped_factor = clamp(abs(factor), 0, limits[1])
+
+    return y + (target_y - y) * clamped_factor
+
+
+def blend_ease(x, y, factor, left, right, limits, slope, tabulated=False):
+    local_y = right['y'] - left['y']
+    ratio = key_ratio(x, left, right)
+
+    if factor < 0:
+        shift = 0
+    else:
+        shift = -1
+
+    ease_y = get_s_curve(1 + slope, tabulated)(ratio, width=2, height=2, xshift=shift, yshift=shift)
+
+    clamped_factor = clamp(abs(factor), 0, limits[1])
+
+    delta = (left['y'] + local_y * ease_y) - y
+
+    return y + delta * clamped_factor
+
+
+def blend_offset(x, y, factor, left, right, limits, first_y, last_y):
+    '''
+    "first_y" and "last_y" are the values of the first and last selected keys
+    '''
+    clamped_factor = clamp(factor, *limits)
+
+    if clamped_factor > 0:
+        delta = right['y'] - last_y
+    else:
+        delta = first_y - left['y']
+
+    return y + delta * clamped_factor
+
+
+def tween(x, y, factor, left, right, limits):
+    clamped_factor = clamp(factor, *limits)
+
+    local_y = right['y'] - left['y']
+    delta = local_y / 2
+    mid = left['y'] + delta
+
+    if np is not None and isinstance(y, np.ndarray):
+        return np.full_like(y, mid + delta * clamped_factor)
+
+    return mid + delta * clamped_factor
+
+
+def push_pull(x, y, factor, left, right, limits):
+    clamped_factor = clamp(factor, *limits)
+
+    big_adjacent = right['x'] - left['x']
+    if big_adjacent == 0:
+        return y
+
+    tangent = (right['y'] - left['y']) / big_adjacent
+    average_y = left['y'] + tangent * (x - left['x'])
+
+    return y + (y - average_y) * clamped_factor
+
+
+def scale(x, y, factor, left, right, limits, average_y=0.0, scale_type=''):
+    '''
+    "scale_type" is the anchor: "L" the left neighbor, "R" the right one, anything else "average_y",
+    the average of the selected keys
+    '''
+    clamped_factor = clamp(factor, *limits)
+
+    if scale_type == 'L':
+        anchor = left['y']
+    elif scale_type == 'R':
+        anchor = right['y']
+    else:
+        anchor = average_y
+
+    return y + (y - anchor) * clamped_factor
+
+
+def smooth(x, y, factor, left, right, limits, smooth_y):
+    '''
+    "smooth_y" has the average of the neighbors of each key (see "key_utils.FCurveSnapshot")
+    '''
+    clamped_factor = clamp(factor, *limits)
+
+    return y - (y - smooth_y) * clamped_factor * 0.5
+
+
+def time_offset(x, y, factor, left, right, limits, curve, cycle_before, cycle_after):
+    '''
+    "curve" is the whole original fcurve (anything with the arrays "evaluate" needs)
+    '''
+    clamped_factor = clamp(factor, *limits)
+
+    return evaluate(curve, x - 20 * clamped_factor, cycle_before, cycle_after)
+
+
+def noise(x, y, factor, left, right, limits, noise_values):
+    '''
+    "noise_values" has one value per key (see "gradient_noise")
+    '''
+    clamped_factor = clamp(factor, *limits)
+
+    return y + noise_values * clamped_factor
+
+
+# ###### Evaluation without an fcurve
+
+
+def cycle_frames(x, y, frames, before='NONE', after='NONE'):
+    '''
+    Brings the frames outside of the keys range back into it, the same way the "CYCLES" modifier does.
+    Returns the new frames and the value offset needed for "REPEAT_OFFSET"
+    '''
+
+    first_x = x[0]
+    period = x[-1] - first_x
+
+    offset = np.zeros_like(frames)
+
+    if period <= 0:
+        return frames, offset
+
+    frames = frames.copy()
+    cycles = (frames - first_x) / period
+
+    # only frames past the keys are wrapped, so one exactly on the last key keeps its value. After the
+    # keys, frames on a whole number of periods are the end of a cycle, not the start of the next one
+    for mode, outside, cycle in ((before, frames < first_x, np.floor(cycles)),
+                                 (after, frames > x[-1], np.ceil(cycles) - 1)):
+        if mode == 'NONE' or not outside.any():
+            continue
+
+        inside = frames[outside] - cycle[outside] * period
+
+        if mode == 'REPEAT_OFFSET':
+            offset[outside] = cycle[outside] * (y[-1] - y[0])
+
+        elif mode == 'MIRROR':
+            odd = cycle[outside] % 2 == 1
+            inside[odd] = first_x + period - (inside[odd] - first_x)
+
+        frames[outside] = inside
+
+    return frames, offset
+
+
+def bezier_segment(x0, y0, x1, y1, x2, y2, x3, y3, frames, iterations=30):
+    '''
+    Value of bezier segments on the given frames. The handles are shortened like Blender does so
+    the segments never go back in time, and "t" is found by bisection
+    '''
+
+    length = x3 - x0
+    length_a = np.abs(x0 - x1)
+    length_b = np.abs(x3 - x2)
+    total = length_a + length_b
+
+    overlap = total > length
+    if overlap.any():
+        fac = np.where(overlap, length / np.where(total == 0, 1, total), 1)
+        x1 = x0 - fac * (x0 - x1)
+        y1 = y0 - fac * (y0 - y1)
+        x2 = x3 - fac * (x3 - x2)
+        y2 = y3 - fac * (y3 - y2)
+
+    def point(p0, p1, p2, p3, t):
+        s = 1 - t
+        return s * s * s * p0 + 3 * s * s * t * p1 + 3 * s * t * t * p2 + t * t * t * p3
+
+    low = np.zeros_like(frames)
+    high = np.ones_like(frames)
+
+    for i in range(iterations):
+        middle = (low + high) / 2
+        below = point(x0, x1, x2, x3, middle) < frames
+        low = np.where(below, middle, low)
+        high = np.where(below, high, middle)
+
+    return point(y0, y1, y2, y3, (low + high) / 2)
+
+
+def evaluate(curve, frames, before='NONE', after='NONE'):
+    '''
+    Value of a curve on the given frames. "curve" has one array per attribute with an item per key:
+    "x", "y", "left_x", "left", "right_x", "right" (handles) and "interpolation" (see "interpolations"),
+    like "key_utils.FCurveSnapshot". Works on "BEZIER", "LINEAR" and "CONSTANT" keys, and "before"
+    and "after" are the modes of the "CYCLES" modifier
+    '''
+
+    x = np.asarray(curve.x, dtype=np.float64)
+    y = np.asarray(curve.y, dtype=np.float64)
+    frames = np.asarray(frames, dtype=np.float64)
+
+    if len(x) < 2:
+        return np.full_like(frames, y[0] if len(y) else 0.0)
+
+    frames, offset = cycle_frames(x, y, frames, before, after)
+    frames = np.clip(frames, x[0], x[-1])
+
+    index = np.clip(np.searchsorted(x, frames, side='right') - 1, 0, len(x) - 2)
+    following = index + 1
+
+    x0 = x[index]
+    y0 = y[index]
+    x3 = x[following]
+    y3 = y[following]
+
+    span = x3 - x0
+    ratio = np.where(span > 0, (frames - x0) / np.where(span > 0, span, 1), 0)
+    values = y0 + (y3 - y0) * ratio
+
+    interpolation = np.asarray(curve.interpolation)[index]
+
+    constant = interpolation == interpolations['CONSTANT']
+    values[constant] = y0[constant]
+
+    bezier = interpolation == interpolations['BEZIER']
+    if bezier.any():
+        right_x = np.asarray(curve.right_x)[index][bezier]
+        right_y = np.asarray(curve.right)[index][bezier]
+        left_x = np.asarray(curve.left_x)[following][bezier]
+        left_y = np.asarray(curve.left)[following][bezier]
+
+        values[bezier] = bezier_segment(x0[bezier], y0[bezier], right_x, right_y,
+                                        left_x, left_y, x3[bezier], y3[bezier],
+                                        frames[bezier])
+
+    # keys exactly on the last frame take its value, whatever the interpolation of the segment
+    last = frames >= x[-1]
+    values[last] = y[-1]
+
+    return values + offset
+
+
+# ###### Noise
+
+
+def lattice_gradient(lattice, seed):
+    '''
+    Pseudo random slope between -1 and 1 for the integer points of the noise. It is a hash of the
+    point and the seed, so it works the same on ints and on numpy arrays of ints
+    '''
+
+    h = (lattice * 0x27d4eb2d + seed * 0x165667b1) & 0x7fffffff
+    h = ((h ^ (h >> 15)) * 0x5bd1e995) & 0x7fffffff
+    h = ((h ^ (h >> 13)) * 0x1b873593) & 0x7fffffff
+    h = h ^ (h >> 16)
+
+    return h * (2.0 / 0x7fffffff) - 1.0
+
+
+def blend_gradients(fraction, left_gradient, right_gradient):
+    '''
+    Value of the noise between two integer points with the given slopes
+    '''
+
+    fade = fraction * fraction * fraction * (fraction * (fraction * 6 - 15) + 10)
+    left_value = left_gradient * fraction
+    right_value = right_gradient * (fraction - 1)
+
+    return left_value + fade * (right_value - left_value)
+
+
+def gradient_noise(frames, seed, scale=0.2):
+    '''
+    1-D gradient noise between -0.5 and 0.5 on the given frames. The same frames and seed always
+    give the same values. "scale" works like the one of the "NOISE" modifier
+    '''
+
+    if np is None:
+        noise = []
+        for frame in frames:
+            position = frame / scale + 0.5
+            lattice = math.floor(position)
+            noise.append(blend_gradients(position - lattice,
+                                         lattice_gradient(lattice, seed),
+                                         lattice_gradient(lattice + 1, seed)))
+        return noise
+
+    position = np.asarray(frames, dtype=np.float64) / scale + 0.5
+    lattice = np.floor(position).astype(np.int64)
+
+    return blend_gradients(position - lattice,
+                           lattice_gradient(lattice, seed),
+                           lattice_gradient(lattice + 1, seed))
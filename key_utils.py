@@ -1,26 +1,108 @@
 import bpy
-from . import utils, cur_utils
+import bisect
 
+from bpy.app.handlers import persistent
+from collections import namedtuple
 
+from . import utils, cur_utils, curve_math
+
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
+
+# Snapshots the sliders work with, taken when a slider is used: {scene name: {object name: {fcurve index: FCurveSnapshot}}}
 global_values = {}
 
+# Snapshots kept between slider calls, so using a slider again only reads the fcurves that changed:
+# {(action name, data_path, array_index): FCurveSnapshot}
+snapshot_cache = {}
 
-def get_selected(fcurve):
+# actions the sliders tagged themselves. Their changed fcurves are already out of the cache
+own_updates = set()
+
+# Options the sliders read, taken once per operator call instead of on every fcurve (see "get_settings()")
+SliderSettings = namedtuple('SliderSettings', (
+    'show_only_selected', 'show_hidden',
+    'affect_non_selected_fcurves', 'affect_non_selected_keys',
+    'min_value', 'max_value', 'noise_phase', 'curve_table',
+    'cycle_before', 'cycle_after',
+    'left_ref_frame', 'right_ref_frame', 'frame'))
+
+
+def get_settings(context, slider=None):
     '''
-    Creates a list of selected keys index
+    "SliderSettings" with the current options. "slider" is the slider (or slider slot) being used,
+    the main slider if None
+    '''
+
+    animaide = context.scene.animaide
+    dopesheet = context.space_data.dopesheet
+
+    if slider is None:
+        slider = animaide.slider
+
+    return SliderSettings(show_only_selected=dopesheet.show_only_selected,
+                          show_hidden=dopesheet.show_hidden,
+                          affect_non_selected_fcurves=animaide.slider.affect_non_selected_fcurves,
+                          affect_non_selected_keys=animaide.slider.affect_non_selected_keys,
+                          min_value=slider.min_value,
+                          max_value=slider.max_value,
+                          noise_phase=slider.noise_phase,
+                          curve_table=animaide.slider.curve_table,
+                          cycle_before=animaide.clone.cycle_before,
+                          cycle_after=animaide.clone.cycle_after,
+                          left_ref_frame=slider.left_ref_frame,
+                          right_ref_frame=slider.right_ref_frame,
+                          frame=context.scene.frame_current)
+
+
+def get_selection(fcurve):
+    '''
+    Selection state of every key of the fcurve, read in bulk straight from the keys
+    '''
+
+    keys = fcurve.keyframe_points
+
+    if np is None:
+        selected = [False] * len(keys)
+    else:
+        selected = np.empty(len(keys), dtype=bool)
+
+    keys.foreach_get('select_control_point', selected)
+
+    return selected
+
+
+def get_interpolation(fcurve):
+    '''
+    Interpolation of every key of the fcurve as the numbers in "curve_math.interpolations"
     '''
 
     keys = fcurve.keyframe_points
-    keyframe_indexes = []
+    interpolation = [0] * len(keys)
+
+    try:
+        keys.foreach_get('interpolation', interpolation)
+    except (TypeError, RuntimeError):
+        # not every Blender version gives bulk access to enum properties
+        interpolation = [curve_math.interpolations.get(key.interpolation, 1) for key in keys]
+
+    return interpolation
+
+
+def get_selected(fcurve):
+    '''
+    Creates a list of selected keys index
+    '''
 
     if getattr(fcurve.group, 'name', None) == cur_utils.group_name:
         return []  # we don't want to select keys on reference fcurves
 
-    for index, key in keys.items():
-        if key.select_control_point:
-            keyframe_indexes.append(index)
+    selected = get_selection(fcurve)
 
-    return keyframe_indexes
+    return [index for index in range(len(selected)) if selected[index]]
 
 
 def valid_anim(obj):
@@ -35,13 +117,12 @@ def valid_anim(obj):
     return bool(fcurves)
 
 
-def valid_fcurve(fcurve):
+def valid_fcurve(fcurve, settings):
     '''
     Validates an fcurve to see if it can be used with animaide
     '''
 
-    animaide = bpy.context.scene.animaide
-    if animaide.slider.affect_non_selected_fcurves is False:
+    if settings.affect_non_selected_fcurves is False:
         if fcurve.select is False:
             return False
 
@@ -67,147 +148,422 @@ def set_handles(key, lh_delta, rh_delta):
     set_handle(key, 'right', rh_delta)
 
 
-def get_sliders_globals(selected=True, original=True, left_frame=None, right_frame=None):
+def follow_handles(fcurve, snapshot, keys):
+    '''
+    Moves the handles of the keys with them, keeping the distance they had in the snapshot whatever
+    their type. A cheap stand-in for the handle recalculation of "fcurve.update()" while sliding
+    '''
+
+    points = fcurve.keyframe_points
+
+    for index in keys:
+        key = points[index]
+        y = key.co.y
+        key.handle_left.y = y - (snapshot.y[index] - snapshot.left[index])
+        key.handle_right.y = y - (snapshot.y[index] - snapshot.right[index])
+
+
+def get_key_coords(fcurve):
+    '''
+    Reads "co", "handle_left" and "handle_right" of every key of the fcurve in bulk.
+    Each one is returned as an array of shape (keys, 2)
+    '''
+
+    keys = fcurve.keyframe_points
+    size = len(keys) * 2
+
+    coords = []
+    for attribute in ('co', 'handle_left', 'handle_right'):
+        values = np.empty(size, dtype=np.float32)
+        keys.foreach_get(attribute, values)
+        coords.append(values.reshape(-1, 2))
+
+    return coords
+
+
+def set_key_coords(fcurve, co, handle_left, handle_right):
+    '''
+    Writes back in bulk the arrays given by "get_key_coords"
+    '''
+
+    keys = fcurve.keyframe_points
+    keys.foreach_set('co', co.ravel())
+    keys.foreach_set('handle_left', handle_left.ravel())
+    keys.foreach_set('handle_right', handle_right.ravel())
+
+
+def update_fcurve(fcurve):
+    '''
+    "fcurve.update()" of the fcurves modified by the tools, kept in one place so it can be profiled
+    '''
+
+    fcurve.update()
+
+
+def tag_actions(context, actions):
+    '''
+    Bulk writes don't send the usual key updates, so the actions that were changed get tagged by hand
+    '''
+
+    for action in actions:
+        action.update_tag()
+        own_updates.add(action.name)
+
+    if context.area is not None:
+        context.area.tag_redraw()
+
+
+class FCurveSnapshot:
+    '''
+    Original values of an fcurve kept in flat arrays (one item per key) so the sliders can index
+    into them directly:
+    x, y: key coordinates
+    left, right: "y" value of the left and right handles
+    left_x, right_x: "x" value of the left and right handles
+    interpolation: interpolation of every key (see "curve_math.interpolations")
+    smooth_y: average of the neighboring selected keys (or the key value itself on the ends)
+    selected: selection mask
+    selected_keys: index of the keys affected by the sliders
+    left_neighbor, right_neighbor: index of the keys surrounding the affected ones (-1 if there are none)
+    left_y_ref, right_y_ref: value of the fcurve on the reference frames (None if not requested)
+    '''
+
+    __slots__ = ('x', 'y', 'left', 'right', 'left_x', 'right_x', 'interpolation', 'smooth_y',
+                 'selected', 'selected_keys', 'left_neighbor', 'right_neighbor',
+                 'left_y_ref', 'right_y_ref')
+
+    def __init__(self, fcurve, selected=None):
+        keys = fcurve.keyframe_points
+        count = len(keys)
+
+        if np is None:
+            co, handle_left, handle_right = [[0.0] * (count * 2) for i in range(3)]
+        else:
+            co, handle_left, handle_right = [np.empty(count * 2, dtype=np.float32) for i in range(3)]
+
+        keys.foreach_get('co', co)
+        keys.foreach_get('handle_left', handle_left)
+        keys.foreach_get('handle_right', handle_right)
+
+        if selected is None:
+            selected = get_selection(fcurve)
+
+        if np is None:
+            self.x = co[0::2]
+            self.y = co[1::2]
+            self.left = handle_left[1::2]
+            self.right = handle_right[1::2]
+            self.left_x = handle_left[0::2]
+            self.right_x = handle_right[0::2]
+            self.interpolation = get_interpolation(fcurve)
+        else:
+            self.x = np.ascontiguousarray(co[0::2])
+            self.y = np.ascontiguousarray(co[1::2])
+            self.left = np.ascontiguousarray(handle_left[1::2])
+            self.right = np.ascontiguousarray(handle_right[1::2])
+            self.left_x = np.ascontiguousarray(handle_left[0::2])
+            self.right_x = np.ascontiguousarray(handle_right[0::2])
+            self.interpolation = np.array(get_interpolation(fcurve), dtype=np.int8)
+
+        self.selected = selected
+        self.smooth_y = self.get_smooth_y()
+        self.reset_keys()
+
+    def reset_keys(self):
+        '''
+        Affected keys from the selection, without neighbors or reference values. These change with
+        every slider call (see "get_sliders_globals"), the rest of the snapshot only with the keys
+        '''
+
+        if np is None:
+            self.selected_keys = [index for index in range(len(self.selected)) if self.selected[index]]
+        else:
+            self.selected_keys = np.flatnonzero(self.selected)
+
+        self.left_neighbor = -1
+        self.right_neighbor = -1
+        self.left_y_ref = None
+        self.right_y_ref = None
+
+    def get_smooth_y(self):
+        '''
+        Average of the previous and next key of every key. A neighbor that is not selected counts with
+        the value of the key itself, so the ends of a selected block are only smoothed towards it
+        '''
+
+        y = self.y
+        selected = self.selected
+
+        if np is None:
+            last = len(y) - 1
+            smooth_y = []
+            for index in range(len(y)):
+                previous_y = y[index - 1] if index > 0 and selected[index - 1] else y[index]
+                next_y = y[index + 1] if index < last and selected[index + 1] else y[index]
+                smooth_y.append((previous_y + next_y) / 2)
+            return smooth_y
+
+        previous_y = y.copy()
+        previous_y[1:] = np.where(selected[:-1], y[:-1], y[1:])
+
+        next_y = y.copy()
+        next_y[:-1] = np.where(selected[1:], y[1:], y[:-1])
+
+        return (previous_y + next_y) / 2
+
+    def set_neighbors(self):
+        '''
+        Stores the index of the keys next to the first and last affected keys. On the ends of the
+        fcurve the affected key is its own neighbor
+        '''
+
+        if not len(self.selected_keys):
+            return
+
+        first_index = self.selected_keys[0]
+        last_index = self.selected_keys[-1]
+
+        self.left_neighbor = max(first_index - 1, 0)
+        self.right_neighbor = min(last_index + 1, len(self.x) - 1)
+
+    def get_neighbor(self, index):
+        '''
+        Coordinates of a key as a dictionary
+        '''
+
+        return {'x': float(self.x[index]), 'y': float(self.y[index])}
+
+
+class KeyIndex:
+    '''
+    Frames of the keys of an fcurve. Keys are always sorted by frame, so keys can be found with a
+    binary search instead of going through all of them
+    '''
+
+    __slots__ = ('x',)
+
+    def __init__(self, x):
+        self.x = x
+
+    @classmethod
+    def from_fcurve(cls, fcurve):
+        keys = fcurve.keyframe_points
+
+        if np is None:
+            co = [0.0] * (len(keys) * 2)
+        else:
+            co = np.empty(len(keys) * 2, dtype=np.float32)
+
+        keys.foreach_get('co', co)
+
+        return cls(co[0::2])
+
+    def search(self, frame, side='left'):
+        '''
+        Number of keys before the frame ("left") or before and on the frame ("right")
+        '''
+
+        if np is None:
+            if side == 'left':
+                return bisect.bisect_left(self.x, frame)
+            return bisect.bisect_right(self.x, frame)
+
+        return int(np.searchsorted(self.x, frame, side=side))
+
+    def key_at(self, frame):
+        '''
+        Index of the key on the frame, None if there is none
+        '''
+
+        index = self.search(frame)
+
+        if index < len(self.x) and self.x[index] == frame:
+            return index
+
+        return None
+
+    def neighbors(self, frame):
+        '''
+        Index of the closest keys to the left and right of the frame (not on it), None if there is none
+        '''
+
+        left = self.search(frame) - 1
+        right = self.search(frame, side='right')
+
+        if left < 0:
+            left = None
+
+        if right >= len(self.x):
+            right = None
+
+        return left, right
+
+    def keys_in_range(self, start, end):
+        '''
+        Indexes of the keys between two frames, both included
+        '''
+
+        return range(self.search(start), self.search(end, side='right'))
+
+
+def get_sliders_globals(left_frame=None, right_frame=None, settings=None):
     '''
     Gets all the global values needed to work with the sliders
     '''
 
     context = bpy.context
-    animaide = context.scene.animaide
 
-    if context.space_data.dopesheet.show_only_selected:
+    if settings is None:
+        settings = get_settings(context)
+
+    if settings.show_only_selected:
         objects = context.selected_objects
     else:
         objects = bpy.data.objects
 
+    values = get_scene_values(context.scene)
+
     for obj in objects:
 
         if not valid_anim(obj):
             continue
 
-        # Level 1 variables
-        # if object.type == 'ARMATURE':
-        #     bones = context.selected_pose_bones
-
         fcurves = obj.animation_data.action.fcurves
         curves = {}
 
         for fcurve_index, fcurve in fcurves.items():
-            # print('fcurve: ', fcurve_index)
 
-            if not valid_fcurve(fcurve):
+            if not valid_fcurve(fcurve, settings):
                 continue
 
-            # level 2 variables
-            curve_items = {}
-            keyframes = []
-            values = {}
-            every_key = []
+            snapshot = get_snapshot(fcurve)
 
-            keys = fcurve.keyframe_points
+            if not len(snapshot.selected_keys) and settings.affect_non_selected_keys is True:
+                # what to do if no key is selected
+                index = KeyIndex(snapshot.x).key_at(settings.frame)
+                if index is not None:
+                    # same type as the keys taken from the selection (see "reset_keys")
+                    snapshot.selected_keys = [index] if np is None else np.array([index])
 
-            for key_index, key in keys.items():
+            snapshot.set_neighbors()
 
-                # stores coordinate of every key
-                handles = {'l': key.handle_left.y, 'r': key.handle_right.y}
-                co = {'x': key.co.x, 'y': key.co.y}
-                values[key_index] = co
-                values[key_index]['handles'] = handles
+            if left_frame is not None or right_frame is not None:
+                snapshot.left_y_ref = fcurve.evaluate(left_frame)
+                snapshot.right_y_ref = fcurve.evaluate(right_frame)
 
-                # stores every key
-                every_key.append(key_index)
+            curves[fcurve_index] = snapshot
 
-                # stores only selected keys
-                if key.select_control_point:
-                    keyframes.append(key_index)
+        values[obj.name] = curves
 
-                    # find smooth values (average) of the original keys
-            # for key_index in keyframes:
+    return
 
-                    key = fcurve.keyframe_points[key_index]
 
-                    if key_index - 1 not in keyframes:
-                        values[key_index]['sy'] = 'book end'
-                        prevkey_value = key.co.y
-                    else:
-                        prevkey_value = fcurve.keyframe_points[key_index - 1].co.y
+def get_scene_values(scene):
+    '''
+    Snapshots taken for the objects of a scene (see "get_sliders_globals")
+    '''
 
-                    if key_index + 1 not in keyframes:
-                        values[key_index]['sy'] = 'book end'
-                        nextkey_value = key.co.y
-                    else:
-                        nextkey_value = fcurve.keyframe_points[key_index + 1].co.y
+    return global_values.setdefault(scene.name, {})
 
-                    # smooth = (prevkey_value + key.co.y + nextkey_value) / 3
-                    smooth = (prevkey_value + nextkey_value) / 2
-                    values[key_index]['sy'] = smooth
 
-            if keyframes:
-                left_neighbor, right_neighbor = get_selected_neigbors(fcurve, keyframes)
-            else:
-                # what to do if no key is selected
+# ###### Snapshot cache
 
-                if animaide.slider.affect_non_selected_keys is True:
-                    index = on_current_frame(fcurve)
-                    if index is None:
-                        keyframes = []
-                        left_neighbor = None
-                        right_neighbor = None
-                    else:
-                        keyframes = [index]
-                        left_neighbor, right_neighbor = get_frame_neighbors(fcurve, frame=None, clamped=False)
-                else:
-                    keyframes = []
-                    left_neighbor = None
-                    right_neighbor = None
-
-            if selected:
-                # Store selected keys
-                curve_items['selected_keys'] = keyframes
-
-            if left_neighbor is None:
-                curve_items['left_neighbor'] = None
-            else:
-                # stores coordinates of left neighboring key
-                co = {'x': left_neighbor.co.x, 'y': left_neighbor.co.y}
-                curve_items['left_neighbor'] = co
-
-            if right_neighbor is None:
-                curve_items['right_neighbor'] = None
-            else:
-                # stores coordinates of right neighboring key
-                co = {'x': right_neighbor.co.x, 'y': right_neighbor.co.y}
-                curve_items['right_neighbor'] = co
-
-            if original:
-                # stores original values of every key
-                curve_items['original_values'] = values
-                curve_items['every_key'] = every_key
 
-            if left_frame is not None or right_frame is not None:
-                frames = {'left_y': fcurve.evaluate(left_frame),
-                          'right_y': fcurve.evaluate(right_frame)}
-                curve_items['ref_frames'] = frames
+def get_snapshot(fcurve):
+    '''
+    Snapshot of the fcurve, the one in "snapshot_cache" if the selection of its keys is the same
+    '''
 
-            curves[fcurve_index] = curve_items
+    key = (fcurve.id_data.name, fcurve.data_path, fcurve.array_index)
+    snapshot = snapshot_cache.get(key)
+    selected = get_selection(fcurve)
 
-        global_values[obj.name] = curves
+    if snapshot is not None:
+        if np is None:
+            same = snapshot.selected == selected
+        else:
+            same = np.array_equal(snapshot.selected, selected)
 
-    return
+        if same:
+            snapshot.reset_keys()
+            return snapshot
+
+    snapshot = snapshot_cache[key] = FCurveSnapshot(fcurve, selected)
+
+    return snapshot
+
+
+def forget_snapshots(fcurves):
+    '''
+    Drops the cached snapshots of fcurves modified by the sliders
+    '''
+
+    for fcurve in fcurves:
+        snapshot_cache.pop((fcurve.id_data.name, fcurve.data_path, fcurve.array_index), None)
+
+
+@persistent
+def forget_changed_snapshots(scene, depsgraph=None):
+    '''
+    Handler that drops the cached snapshots of the actions Blender updated. Any change of an object
+    counts, as Blender doesn't say if it was its keys
+    '''
+
+    if not snapshot_cache or depsgraph is None:
+        own_updates.clear()
+        return
+
+    changed = set()
+
+    for update in depsgraph.updates:
+        id_data = update.id.original
+
+        if isinstance(id_data, bpy.types.Action):
+            changed.add(id_data.name)
+        elif isinstance(id_data, bpy.types.Object):
+            action = getattr(id_data.animation_data, 'action', None)
+            if action is not None:
+                changed.add(action.name)
+
+    changed -= own_updates
+    own_updates.clear()
+
+    if changed:
+        for key in [key for key in snapshot_cache if key[0] in changed]:
+            del snapshot_cache[key]
+
+
+@persistent
+def clear_snapshots(*args):
+    '''
+    Handler for undo, redo and file loading, which replace the keys
+    '''
+
+    global_values.clear()
+    snapshot_cache.clear()
+    bone_channels.clear()
+    own_updates.clear()
 
 
-def reset_original():
+def reset_original(settings=None, update=True):
     '''
-    Set selected keys to the values in the global variables
+    Set the keys back to the values in the global variables. "update" can be False if the fcurves
+    were not updated since the snapshot, as the keys get back the exact handles they had
     '''
 
     context = bpy.context
 
-    if context.space_data.dopesheet.show_only_selected is True:
+    if settings is None:
+        settings = get_settings(context)
+
+    if settings.show_only_selected is True:
         objects = context.selected_objects
     else:
         objects = context.scene.objects
 
+    values = get_scene_values(context.scene)
+    actions = []
+
     for obj in objects:
 
         if not valid_anim(obj):
@@ -215,49 +571,54 @@ def reset_original():
 
         visible = obj.visible_get()
 
-        if not context.space_data.dopesheet.show_hidden and not visible:
+        if not settings.show_hidden and not visible:
             continue
 
         fcurves = obj.animation_data.action.fcurves
+        actions.append(obj.animation_data.action)
+
+        usable_bones = get_usable_bones(settings, obj) if obj.type == 'ARMATURE' else None
 
         for fcurve_index, fcurve in fcurves.items():
-            if not poll_fcurve(context, obj, fcurve):
+            if not poll_fcurve(settings, obj, fcurve, usable_bones):
                 continue
 
-            global_fcurve = global_values[obj.name][fcurve_index]
+            restore_fcurve(fcurve, values[obj.name][fcurve_index], update)
 
-            selected_keys = global_fcurve['selected_keys']
-            original_values = global_fcurve['original_values']
+    tag_actions(context, actions)
 
-            if not selected_keys:
-                index = on_current_frame(fcurve)
-                if index is None:
-                    continue
-                selected_keys = [index]
+    return
 
-            for index in selected_keys:
-                if index is None:
-                    continue
-                k = fcurve.keyframe_points[index]
-                k.co.y = original_values[index]['y']
-                k.handle_left.y = original_values[index]['handles']['l']
-                k.handle_right.y = original_values[index]['handles']['r']
 
-            fcurve.update()
+def restore_fcurve(fcurve, snapshot, update=True):
+    '''
+    Set the keys of one fcurve back to the values of its snapshot
+    '''
 
-    return
+    if np is None:
+        for index in snapshot.selected_keys:
+            k = fcurve.keyframe_points[index]
+            k.co.y = snapshot.y[index]
+            k.handle_left.y = snapshot.left[index]
+            k.handle_right.y = snapshot.right[index]
+    else:
+        co, handle_left, handle_right = get_key_coords(fcurve)
+        co[:, 1] = snapshot.y
+        handle_left[:, 1] = snapshot.left
+        handle_right[:, 1] = snapshot.right
+        set_key_coords(fcurve, co, handle_left, handle_right)
+
+    if update:
+        update_fcurve(fcurve)
 
 
 def on_current_frame(fcurve):
     '''
     returns the index of the key in the current frame
     '''
-    current_index = None
     cur_frame = bpy.context.scene.frame_current
-    for index, key in fcurve.keyframe_points.items():
-        if key.co.x == cur_frame:
-            current_index = index
-    return current_index
+
+    return KeyIndex.from_fcurve(fcurve).key_at(cur_frame)
 
 
 def get_selected_neigbors(fcurve, keyframes):
@@ -305,19 +666,15 @@ def get_frame_neighbors(fcurve, frame=None, clamped=False):
     if frame is None:
         frame = bpy.context.scene.frame_current
     fcurve_keys = fcurve.keyframe_points
-    left_neighbor = fcurve_keys[0]
-    right_neighbor = fcurve_keys[len(fcurve_keys) - 1]
-
-    for key in fcurve.keyframe_points:
-        dif = key.co.x - frame
-        if dif < 0:
-            left = key
-            if left.co.x > left_neighbor.co.x:
-                left_neighbor = left
-        elif dif > 0:
-            right = key
-            if right.co.x < right_neighbor.co.x:
-                right_neighbor = right
+    left_index, right_index = KeyIndex.from_fcurve(fcurve).neighbors(frame)
+
+    if left_index is None:
+        left_index = 0
+    if right_index is None:
+        right_index = len(fcurve_keys) - 1
+
+    left_neighbor = fcurve_keys[left_index]
+    right_neighbor = fcurve_keys[right_index]
 
     if clamped is False:
         if left_neighbor.co.x == frame:
@@ -340,42 +697,73 @@ def linear_y(left_neighbor, right_neighbor, key):
     return left_neighbor['y'] + oposite
 
 
-def poll_fcurve(context, obj, fcurve):
-    if not valid_fcurve(fcurve):
+# ###### Armature channels
+
+# "bone" of the fcurves that animate the armature object itself (transforms and custom properties)
+object_channel = ''
+
+# bone animated by every data_path seen so far: {data_path: bone name}. It only depends on the string
+bone_channels = {}
+
+
+def parse_channel_bone(data_path):
+    '''
+    Name of the bone animated by a data_path, "object_channel" if it is not a bone
+    '''
+
+    prefix = 'pose.bones["'
+
+    if not data_path.startswith(prefix):
+        return object_channel
+
+    return data_path[len(prefix):].split('"]', 1)[0]
+
+
+def get_channel_bone(data_path):
+    '''
+    "parse_channel_bone()" kept in "bone_channels", as the same data_paths are checked on every call
+    '''
+
+    bone_name = bone_channels.get(data_path)
+
+    if bone_name is None:
+        bone_name = bone_channels[data_path] = parse_channel_bone(data_path)
+
+    return bone_name
+
+
+def get_usable_bones(settings, obj):
+    '''
+    Names of the bones of an armature whose fcurves can be modified
+    '''
+
+    only_selected = settings.show_only_selected
+
+    return {bone.name for bone in obj.data.bones if not bone.hide and (bone.select or not only_selected)}
+
+
+def poll_fcurve(settings, obj, fcurve, usable_bones=None):
+    '''
+    Checks if the sliders can modify the fcurve. "usable_bones" is the result of "get_usable_bones()"
+    for armatures, so it doesn't have to be calculated again for every fcurve
+    '''
+
+    if not valid_fcurve(fcurve, settings):
         return
 
     if (obj.type == 'ARMATURE'):
-        # bone_name = utils.get_bone_name(fcurve, usable_bones_names)
-        # bone_name = utils.get_bone_name(obj, fcurve)
-        #
 
-        if getattr(fcurve.group, 'name', None) == 'Object Transforms':
-            # When animating an object, by default its fcurves grouped with this name.
-            return
-        elif not fcurve.group:
-            transforms = (
-                'location', 'rotation_euler', 'scale',
-                'rotation_quaternion', 'rotation_axis_angle',
-                '[\"',  # custom property
-            )
-            if fcurve.data_path.startswith(transforms):
-                # fcurve belongs to the  object, so skip it
-                return
-
-        # if fcurve.group.name not in bones_names:
-            # return
-
-        split_data_path = fcurve.data_path.split(sep='"')
-        bone_name = split_data_path[1]
-        bone = obj.data.bones.get(bone_name)
-
-        only_selected = context.space_data.dopesheet.show_only_selected
-
-        if bone is None or bone.hide or (only_selected and not bone.select):
+        bone_name = get_channel_bone(fcurve.data_path)
+
+        if bone_name == object_channel:
+            # fcurve belongs to the  object, so skip it
             return
 
-        # if bone_name is None:
-            # return
+        if usable_bones is None:
+            usable_bones = get_usable_bones(settings, obj)
+
+        if bone_name not in usable_bones:
+            return
 
     if getattr(fcurve.group, 'name', None) == cur_utils.group_name:
         return  # we don't want to select keys on reference fcurves
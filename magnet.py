@@ -1,18 +1,46 @@
 import bpy
+import bisect
+
+from bpy.app.handlers import persistent
 
 from . import cur_utils, key_utils, utils
 
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
 # Anim_transform global variables
 
 user_preview_range = {}
 user_scene_range = {}
 user_auto_animate = False
 
+# value of every animated channel the last time the handler saw it, and the frame it was on:
+# {(object, data_path, index): (frame, value)}
+last_values = {}
+
+# changes smaller than this are ignored
+epsilon = 1e-5
+
+# mask falloff sampled on frames as (frames, weights). None when it has to be read from the mask fcurve
+mask_table = None
+
+# mask properties used to build the current mask (see "get_mask_settings")
+mask_settings = None
+
+# deferred mode: delta of the channels moved during the transform {(object name, data_path, index): delta}
+pending_channels = {}
+
+deferred_interval = 0.1     # seconds between checks for the end of the transform
+
+mask_samples_per_frame = 4
+
 
 # ######### Handlers ############
 
 
-def anim_transform_handlers(scene):
+def anim_transform_handlers(scene, depsgraph=None):
     '''
     Function to be run by the anim_transform Handler
     '''
@@ -21,12 +49,26 @@ def anim_transform_handlers(scene):
 
     context = bpy.context
 
+    if depsgraph is None:
+        depsgraph = context.view_layer.depsgraph
+
+    if not depsgraph.id_type_updated('OBJECT'):
+        # nothing was transformed (frame changes, selection, viewport, etc.)
+        return
+
+    get_mask_table()
+
+    anim_transform = context.scene.animaide.anim_transform
+
     # user_auto_animate = context.scene.tool_settings.use_keyframe_insert_auto
     #
     context.scene.tool_settings.use_keyframe_insert_auto = False
 
     selected_objects = context.selected_objects
 
+    # without access to the modal operators the end of the transform can't be known, it works live
+    deferred = anim_transform.deferred and can_detect_transform(context)
+
     # selected_pose_bones = bpy.context.selected_pose_bones
     # usable_bones_names = []
 
@@ -36,40 +78,50 @@ def anim_transform_handlers(scene):
         fcurves = getattr(action, 'fcurves', None)
 
         if fcurves is None:
-            return
+            continue
+
+        if obj.type == 'ARMATURE':
+            usable_bones = {bone.name for bone in obj.data.bones
+                            if not bone.hide and (bone.select or bone.parent or bone.children)}
 
-        # if obj.type == 'ARMATURE':
-        #     usable_bones_names = utils.get_selected_bones_names(obj, selected_pose_bones)
+        modified = False
+        values = {}
 
         for fcurve in fcurves:
 
             if obj.type == 'ARMATURE':
-                split_data_path = fcurve.data_path.split(sep='"')
-                bone_name = split_data_path[1]
-                bone = obj.data.bones.get(bone_name)
+                bone_name = key_utils.get_channel_bone(fcurve.data_path)
 
-                if bone is None or bone.hide:
-                    return
+                if bone_name != key_utils.object_channel and bone_name not in usable_bones:
+                    continue
 
-                if bone.select or bone.parent or bone.children:
-                    animation_transform(obj, fcurve)
-            else:
-                animation_transform(obj, fcurve)
+            if deferred:
+                defer_transform(context, obj, fcurve, values)
+
+            elif animation_transform(obj, fcurve, values):
+                modified = True
+
+        if modified:
+            # keys written in bulk don't notify Blender of the change
+            action.update_tag()
 
     return
 
 
-def anim_trans_mask_handlers(scene):
+def update_anim_trans_mask():
     '''
-    function to be run by the mask handler. It will handle the mask dimensions
+    Rebuilds the mask after one of its settings changed. Called by the "update" of the mask properties
     '''
 
-    action = bpy.data.actions.get('animaide')
+    mask = get_mask_curve()
 
-    if action is None or not action.fcurves:
+    if mask is None:
         return
 
-    mask = action.fcurves[0]
+    anim_transform = bpy.context.scene.animaide.anim_transform
+
+    if get_mask_settings(anim_transform) == mask_settings and mask_table is not None:
+        return  # same values assigned again
 
     modify_anim_trans_mask(mask, mask.keyframe_points)
 
@@ -79,10 +131,11 @@ def anim_trans_mask_handlers(scene):
 # ######### Main tool ############
 
 
-def animation_transform(obj, fcurve):
+def animation_transform(obj, fcurve, values=None):
     '''
     Modify all the keys in every fcurve of the current object proportionally to the change in transformation
-    on the current frame by the user
+    on the current frame by the user. Returns True if the keys were modified.
+    "values" is the cache of "get_channel_value"
     '''
 
     if fcurve.lock:
@@ -91,47 +144,232 @@ def animation_transform(obj, fcurve):
     if getattr(fcurve.group, 'name', None) == cur_utils.group_name:
         return  # we don't want to select keys on reference fcurves
 
-    action = bpy.data.actions.get('animaide')
-    if action and action.fcurves:
-        mask_curve = action.fcurves[0]
+    delta_y = get_anim_transform_delta(obj, fcurve, values=values)
+
+    if abs(delta_y) < epsilon:
+        return
+
+    offset_keys(fcurve, delta_y)
+
+    key_utils.update_fcurve(fcurve)
+
+    return True
+
+
+def offset_keys(fcurve, delta_y):
+    '''
+    Moves every key of the fcurve, with its handles, by "delta_y" times the weight of the mask
+    '''
+
+    if np is None:
+        keys = fcurve.keyframe_points
+
+        if mask_table is None:
+            weights = None
+        else:
+            weights = get_mask_weights(key_utils.KeyIndex.from_fcurve(fcurve).x)
+
+        for index, k in keys.items():
+
+            if weights is None:
+                factor = 1
+            else:
+                factor = weights[index]
+
+            delta = delta_y * factor
+            k.co.y = k.co.y + delta
+            k.handle_left.y = k.handle_left.y + delta
+            k.handle_right.y = k.handle_right.y + delta
+
+        return
+
+    co, handle_left, handle_right = key_utils.get_key_coords(fcurve)
+
+    if mask_table is None:
+        delta = delta_y
     else:
-        mask_curve = None
+        delta = delta_y * get_mask_weights(co[:, 0])
+
+    co[:, 1] += delta
+    handle_left[:, 1] += delta
+    handle_right[:, 1] += delta
+
+    key_utils.set_key_coords(fcurve, co, handle_left, handle_right)
 
-    delta_y = get_anim_transform_delta(obj, fcurve)
 
-    for k in fcurve.keyframe_points:
+def get_channel_value(obj, fcurve, values):
+    '''
+    Current value of the property animated by the fcurve. "values" keeps the properties already read
+    from the object, so the fcurves of the same vector (location, rotation, scale...) read it only once
+    '''
+
+    data_path = fcurve.data_path
+    prop = values.get(data_path)
 
-        if mask_curve is None:
-            factor = 1
+    if prop is None:
+        try:
+            prop = obj.path_resolve(data_path)
+        except ValueError:
+            prop = ()  # the fcurve doesn't point to an existing property (a deleted bone for example)
         else:
-            factor = mask_curve.evaluate(k.co.x)
+            prop = tuple(prop) if hasattr(prop, '__len__') else (prop,)
 
-        k.co.y = k.co.y + (delta_y * factor)
+        values[data_path] = prop
 
-    fcurve.update()
+    if not prop:
+        return None
 
-    return
+    if fcurve.array_index < len(prop):
+        return prop[fcurve.array_index]
+
+    return prop[0]
 
 
-def get_anim_transform_delta(obj, fcurve):
+def get_anim_transform_delta(obj, fcurve, use_cache=True, values=None):
     '''
-    Determine the transformation change by the user of the current object
+    Determine the transformation change by the user of the current object. With "use_cache" it is 0
+    if the channel has the same value it had the last time it was checked
     '''
 
+    if values is None:
+        values = {}
+
+    target = get_channel_value(obj, fcurve, values)
+
+    if target is None:
+        return 0
+
     cur_frame = bpy.context.scene.frame_current
 
-    source = fcurve.evaluate(cur_frame)
+    # changing the frame doesn't run the handler, so a value is only the same if it is on the same frame
+    channel = (obj.as_pointer(), fcurve.data_path, fcurve.array_index)
+    last_frame, last_value = last_values.get(channel, (None, None))
+    last_values[channel] = (cur_frame, target)
 
-    prop = obj.path_resolve(fcurve.data_path)
+    if use_cache and last_frame == cur_frame and abs(target - last_value) < epsilon:
+        return 0
 
-    try:
-        target = prop[fcurve.array_index]
-    except TypeError:
-        target = prop
+    source = fcurve.evaluate(cur_frame)
 
     return target - source
 
 
+# ######### Deferred mode ############
+
+
+def defer_transform(context, obj, fcurve, values=None):
+    '''
+    Deferred version of "animation_transform": it only records the change of the channel. The keys
+    are modified by "apply_deferred_transform" once the transformation is done
+    '''
+
+    if fcurve.lock:
+        return
+
+    if getattr(fcurve.group, 'name', None) == cur_utils.group_name:
+        return  # we don't want to select keys on reference fcurves
+
+    delta_y = get_anim_transform_delta(obj, fcurve, values=values)
+
+    if abs(delta_y) < epsilon:
+        return
+
+    pending_channels[(obj.name, fcurve.data_path, fcurve.array_index)] = delta_y
+
+    if not bpy.app.timers.is_registered(deferred_transform_timer):
+        bpy.app.timers.register(deferred_transform_timer, first_interval=deferred_interval)
+
+
+def can_detect_transform(context):
+    '''
+    Checks if Blender gives access to the modal operators of the windows (see "transform_running")
+    '''
+
+    windows = context.window_manager.windows
+
+    return len(windows) > 0 and all(hasattr(window, 'modal_operators') for window in windows)
+
+
+def transform_running(context):
+    '''
+    Checks if the user is still transforming, from the modal operators of the windows
+    '''
+
+    for window in context.window_manager.windows:
+        if any(op.bl_idname.startswith('TRANSFORM_OT') for op in window.modal_operators):
+            return True
+
+    return False
+
+
+def deferred_transform_timer():
+    '''
+    Timer that applies the deferred changes when the transformation is done
+    '''
+
+    if not pending_channels:
+        return None
+
+    if transform_running(bpy.context):
+        return deferred_interval
+
+    apply_deferred_transform()
+
+    return None
+
+
+def apply_deferred_transform():
+    '''
+    Modify the keys of every channel changed during the transformation, all at once
+    '''
+
+    get_mask_table()
+
+    actions = set()
+    object_values = {}
+
+    for obj_name, data_path, index in pending_channels:
+        obj = bpy.data.objects.get(obj_name)
+        action = getattr(getattr(obj, 'animation_data', None), 'action', None)
+
+        if action is None:
+            continue
+
+        fcurve = action.fcurves.find(data_path, index=index)
+
+        if fcurve is None:
+            continue
+
+        # the value may have changed since it was recorded (or gone back if the transform was canceled)
+        values = object_values.setdefault(obj_name, {})
+        delta_y = get_anim_transform_delta(obj, fcurve, use_cache=False, values=values)
+
+        if abs(delta_y) < epsilon:
+            continue
+
+        offset_keys(fcurve, delta_y)
+        key_utils.update_fcurve(fcurve)
+        actions.add(action)
+
+    pending_channels.clear()
+
+    # no undo step of its own: the transform already added one, and undoing loads the step from
+    # before the transform, which has the keys as they were too
+    for action in actions:
+        action.update_tag()
+
+
+def cancel_deferred_transform():
+    '''
+    Forgets the deferred changes not applied yet
+    '''
+
+    pending_channels.clear()
+
+    if bpy.app.timers.is_registered(deferred_transform_timer):
+        bpy.app.timers.unregister(deferred_transform_timer)
+
+
 # ######### Mask ############
 
 
@@ -196,20 +434,51 @@ def remove_anim_trans_mask():
     Removes the fcurve and action that are been used as a mask for anim_transform
     '''
 
+    global mask_table, mask_settings
+
     scene = bpy.context.scene
     animaide = scene.animaide
-    action = bpy.data.actions.get('animaide')
 
-    if action is None or animaide.anim_transform.use_mask is False:
+    if animaide.anim_transform.use_mask is False:
         return
 
-    fcurves = action.fcurves
+    mask = get_mask_curve()
+
+    # the "animaide" action is not saved with the file, the mask can be gone while "use_mask" is still on
+    if mask is not None:
+        mask.id_data.fcurves.remove(mask)
 
-    fcurves.remove(fcurves[0])
+    mask_table = None
+    mask_settings = None
 
     animaide.anim_transform.use_mask = False
 
-    reset_timeline_ranges()
+    # the user ranges are only known if the mask was added since the file was opened
+    if user_preview_range:
+        reset_timeline_ranges()
+
+
+def get_mask_curve():
+    '''
+    Fcurve used as mask by anim_transform, None if there isn't one
+    '''
+
+    action = bpy.data.actions.get('animaide')
+
+    if action is None or not action.fcurves:
+        return None
+
+    return action.fcurves[0]
+
+
+def get_mask_settings(anim_transform):
+    '''
+    Values of the properties that define the mask
+    '''
+
+    return (anim_transform.mask_margin_l, anim_transform.mask_blend_l,
+            anim_transform.mask_margin_r, anim_transform.mask_blend_r,
+            anim_transform.interp, anim_transform.easing)
 
 
 def modify_anim_trans_mask(mask_curve, keys):
@@ -217,8 +486,11 @@ def modify_anim_trans_mask(mask_curve, keys):
     Modify the position of the fcurve 4 control points that is been used as mask to anim_transform
     '''
 
+    global mask_settings
+
     animaide = bpy.context.scene.animaide
     anim_transform = animaide.anim_transform
+    mask_settings = get_mask_settings(anim_transform)
 
     left_margin = anim_transform.mask_margin_l
     left_blend = anim_transform.mask_blend_l
@@ -274,6 +546,89 @@ def modify_anim_trans_mask(mask_curve, keys):
     mask_curve.lock = True
     mask_curve.select = True
 
+    mask_curve.update()
+
+    compile_mask(mask_curve)
+
+
+def compile_mask(mask_curve):
+    '''
+    Samples the mask fcurve into "mask_table" so the weight of the keys doesn't have to be evaluated
+    from the fcurve one key at a time
+    '''
+
+    global mask_table
+
+    keys = mask_curve.keyframe_points
+    start = keys[0].co.x
+    end = keys[len(keys) - 1].co.x
+
+    count = max(int((end - start) * mask_samples_per_frame), 1) + 1
+    frames = [start + (end - start) * i / (count - 1) for i in range(count)]
+    weights = [mask_curve.evaluate(frame) for frame in frames]
+
+    if np is not None:
+        frames = np.array(frames)
+        weights = np.array(weights)
+
+    mask_table = (frames, weights)
+
+
+def get_mask_table():
+    '''
+    Current "mask_table", compiled from the mask fcurve if there is one and it wasn't compiled yet
+    '''
+
+    if mask_table is None:
+        mask = get_mask_curve()
+        if mask is not None:
+            compile_mask(mask)
+
+    return mask_table
+
+
+@persistent
+def forget_anim_transform(*args):
+    '''
+    Handler for undo, redo and file loading, which can change the channels and the mask fcurve. The
+    next update reads the channels and compiles the mask again (see "get_mask_table")
+    '''
+
+    global mask_table, mask_settings
+
+    last_values.clear()
+    mask_table = None
+    mask_settings = None
+
+
+def get_mask_weights(frames):
+    '''
+    Weight of the mask on the given frames, interpolated from "mask_table"
+    '''
+
+    table_frames, table_weights = mask_table
+
+    if np is not None:
+        return np.interp(frames, table_frames, table_weights)
+
+    last = len(table_frames) - 1
+    weights = []
+
+    for frame in frames:
+        index = bisect.bisect_right(table_frames, frame)
+
+        if index == 0:
+            weights.append(table_weights[0])
+        elif index > last:
+            weights.append(table_weights[last])
+        else:
+            left_frame = table_frames[index - 1]
+            span = table_frames[index] - left_frame
+            ratio = (frame - left_frame) / span if span else 0
+            weights.append(table_weights[index - 1] + (table_weights[index] - table_weights[index - 1]) * ratio)
+
+    return weights
+
 
 # -------- For mask interface -------
 
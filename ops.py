@@ -1,7 +1,7 @@
 import bpy
 import os
 
-from . import utils, key_utils, cur_utils, slider_tools, magnet
+from . import key_utils, cur_utils, slider_tools, magnet, profiler
 from bpy.props import StringProperty, EnumProperty, BoolProperty, \
     IntProperty, FloatProperty
 from bpy.types import Operator
@@ -28,12 +28,16 @@ class AAT_OT:
         self.slots = self.animaide.slider_slots
         self.item = self.animaide.slider
         self.init_mouse_x = None
+        self.plan = None
+        self.preview_plan = None
+        self.defer_update = False
+        self.settings = None
+        self.timer = None
 
     def __del__(self):
         pass
 
     def execute(self, context):
-        utils.update_keyframe_points(context)
         return slider_tools.looper(self, context)
 
     def modal(self, context, event):
@@ -241,6 +245,29 @@ class AAT_OT_global_settings(Operator):
         col.label(text='Settings')
         col.prop(animaide.slider, 'affect_non_selected_fcurves', text='Non-selected fcurves', toggle=False)
         col.prop(animaide.slider, 'affect_non_selected_keys', text='Non-selected keys on frame', toggle=False)
+        col.prop(animaide.slider, 'throttle', text='Limit updates', toggle=False)
+        row = col.row()
+        row.active = animaide.slider.throttle
+        row.prop(animaide.slider, 'refresh_rate', text='Updates per second')
+        col.prop(animaide.slider, 'curve_table', text='Ease curves from table', toggle=False)
+        col.prop(animaide.slider, 'preview', text='Only keys in view while sliding', toggle=False)
+        col.prop(animaide.slider, 'update_on_release', text='Update curves on release', toggle=False)
+        col.prop(animaide.slider, 'sliced_commit', text='Apply in the background', toggle=False)
+
+
+class AAT_OT_cancel_commit(Operator):
+    """Stops applying the slider and puts the keys back as they were"""
+    bl_idname = 'animaide.cancel_commit'
+    bl_label = "Cancel Slider"
+
+    @classmethod
+    def poll(cls, context):
+        return slider_tools.pending_commit is not None
+
+    def execute(self, context):
+        slider_tools.cancel_sliced_commit()
+
+        return {'FINISHED'}
 
 
 class AAT_OT_add_slider(Operator):
@@ -395,9 +422,6 @@ class AAT_OT_create_anim_trans_mask(Operator):
 
         # context.scene.tool_settings.use_keyframe_insert_auto = False
 
-        if magnet.anim_trans_mask_handlers not in bpy.app.handlers.depsgraph_update_pre:
-            bpy.app.handlers.depsgraph_update_pre.append(magnet.anim_trans_mask_handlers)
-
         return {'FINISHED'}
 
 
@@ -422,6 +446,8 @@ class AAT_OT_anim_transform_on(Operator):
         # bpy.ops.wm.redraw_timer()
         # bpy.data.window_managers['WinMan'].windows.update()
 
+        magnet.forget_anim_transform()
+
         if magnet.anim_transform_handlers not in bpy.app.handlers.depsgraph_update_pre:
             bpy.app.handlers.depsgraph_update_pre.append(magnet.anim_transform_handlers)
 
@@ -447,8 +473,8 @@ class AAT_OT_anim_transform_off(Operator):
         if magnet.anim_transform_handlers in bpy.app.handlers.depsgraph_update_pre:
             bpy.app.handlers.depsgraph_update_pre.remove(magnet.anim_transform_handlers)
 
-        if magnet.anim_trans_mask_handlers in bpy.app.handlers.depsgraph_update_pre:
-            bpy.app.handlers.depsgraph_update_pre.remove(magnet.anim_trans_mask_handlers)
+        magnet.last_values.clear()
+        magnet.cancel_deferred_transform()
 
         magnet.remove_anim_trans_mask()
 
@@ -473,9 +499,6 @@ class AAT_OT_delete_anim_trans_mask(Operator):
 
     def execute(self, context):
 
-        if magnet.anim_trans_mask_handlers in bpy.app.handlers.depsgraph_update_pre:
-            bpy.app.handlers.depsgraph_update_pre.remove(magnet.anim_trans_mask_handlers)
-
         magnet.remove_anim_trans_mask()
 
         return {'FINISHED'}
@@ -509,11 +532,64 @@ class AAT_OT_anim_transform_settings(Operator):
         row.prop(animaide.anim_transform, 'easing', text='', icon_only=False)
         row = layout.row(align=False)
         row.prop(animaide.anim_transform, 'interp', text=' ', expand=True)
+        row = layout.row(align=False)
+        row.prop(animaide.anim_transform, 'deferred', text='On release')
         # row = layout.row(align=False)
         # row.prop(animaide.anim_transform, 'use_markers', text='Use Markers')
         # row.prop(animaide.anim_transform, 'interp', text='', icon_only=False)
 
 
+# ###############  PROFILER  ###############
+
+
+class AAT_OT_profiler_toggle(Operator):
+    """Starts or stops timing the sliders and AnimTransform"""
+    bl_idname = "animaide.profiler_toggle"
+    bl_label = "Profiler"
+
+    def execute(self, context):
+        if profiler.enabled:
+            profiler.disable()
+        else:
+            profiler.enable()
+
+        return {'FINISHED'}
+
+
+class AAT_OT_profiler_reset(Operator):
+    """Clears the timings taken so far"""
+    bl_idname = "animaide.profiler_reset"
+    bl_label = "Reset Timings"
+
+    def execute(self, context):
+        profiler.reset()
+
+        return {'FINISHED'}
+
+
+class AAT_OT_profiler_dump(Operator):
+    """Saves the timings to a JSON file"""
+    bl_idname = "animaide.profiler_dump"
+    bl_label = "Save Timings"
+
+    filepath: StringProperty(subtype='FILE_PATH')
+    filter_glob: StringProperty(default='*.json', options={'HIDDEN'})
+
+    def execute(self, context):
+        profiler.dump(self.filepath)
+        self.report({'INFO'}, 'Timings saved to %s' % self.filepath)
+
+        return {'FINISHED'}
+
+    def invoke(self, context, event):
+        if not self.filepath:
+            self.filepath = 'animaide_profile.json'
+
+        context.window_manager.fileselect_add(self)
+
+        return {'RUNNING_MODAL'}
+
+
 # ###############  HELP  ###############
 
 
@@ -590,6 +666,7 @@ class AAT_OT_manual(Operator):
 # Variable to register Classes
 
 classes = (
+    AAT_OT_cancel_commit,
     AAT_OT_add_slider,
     AAT_OT_remove_slider,
     AAT_OT_anim_transform_on,
@@ -615,5 +692,8 @@ classes = (
     AAT_OT_time_offset,
     AAT_OT_tween,
     AAT_OT_create_anim_trans_mask,
-    AAT_OT_delete_anim_trans_mask
+    AAT_OT_delete_anim_trans_mask,
+    AAT_OT_profiler_toggle,
+    AAT_OT_profiler_reset,
+    AAT_OT_profiler_dump
 )
@@ -0,0 +1,236 @@
+'''
+Optional timing of the hot paths of the sliders and Anim Transform. While it is enabled the
+functions listed in "get_targets" are replaced by timed versions of themselves; disabling it puts
+the originals back, so it costs nothing when it is not in use.
+'''
+
+import bpy
+import json
+import time
+
+from collections import deque
+from functools import wraps
+
+from . import key_utils, slider_tools, magnet
+
+enabled = False
+
+# {name: Stat}
+stats = {}
+
+# functions replaced while enabled: {(module, name): function}
+originals = {}
+original_sliders = {}
+
+# timings kept per function to calculate the percentiles
+max_samples = 10000
+
+
+class Stat:
+    '''
+    Calls, time and amount of fcurves and keys handled by one function
+    '''
+
+    __slots__ = ('calls', 'total', 'samples', 'fcurves', 'keys')
+
+    def __init__(self):
+        self.calls = 0
+        self.total = 0.0
+        self.samples = deque(maxlen=max_samples)
+        self.fcurves = 0
+        self.keys = 0
+
+    def add(self, elapsed, fcurves=0, keys=0):
+        self.calls += 1
+        self.total += elapsed
+        self.samples.append(elapsed)
+        self.fcurves += fcurves
+        self.keys += keys
+
+    def percentile(self, percent):
+        if not self.samples:
+            return 0.0
+
+        samples = sorted(self.samples)
+        index = int(round((len(samples) - 1) * percent / 100))
+
+        return samples[index]
+
+    def as_dict(self):
+        return {'calls': self.calls,
+                'total_ms': self.total * 1000,
+                'mean_ms': self.total * 1000 / self.calls if self.calls else 0.0,
+                'p50_ms': self.percentile(50) * 1000,
+                'p90_ms': self.percentile(90) * 1000,
+                'p99_ms': self.percentile(99) * 1000,
+                'max_ms': max(self.samples) * 1000 if self.samples else 0.0,
+                'fcurves': self.fcurves,
+                'keys': self.keys}
+
+
+# ###### What is measured
+
+
+def count_snapshots(args, result):
+    curves = [snapshot for objects in key_utils.global_values.values()
+              for snapshots in objects.values() for snapshot in snapshots.values()]
+
+    return len(curves), sum(len(snapshot.selected_keys) for snapshot in curves)
+
+
+def count_plan(args, result):
+    plan = args[0].plan or ()
+
+    return len(plan), sum(len(item.snapshot.selected_keys) for item in plan)
+
+
+def count_items(args, result):
+    return len(args[0]), sum(len(item.snapshot.selected_keys) for item in args[0])
+
+
+def count_fcurve(args, result):
+    return 1, len(args[0].keyframe_points)
+
+
+def count_item(args, result):
+    return 1, len(args[0].snapshot.selected_keys)
+
+
+def count_kernel(args, result):
+    return 1, len(args[0])
+
+
+def get_targets():
+    '''
+    Functions to time as (module, name, function counting the fcurves and keys it handled)
+    '''
+
+    return ((key_utils, 'get_sliders_globals', count_snapshots),
+            (key_utils, 'reset_original', count_snapshots),
+            (key_utils, 'update_fcurve', count_fcurve),
+            (slider_tools, 'looper', count_plan),
+            (slider_tools, 'restore_plan', count_items),
+            (slider_tools, 'apply_array', count_item),
+            (magnet, 'anim_transform_handlers', None),
+            (magnet, 'update_anim_trans_mask', None))
+
+
+def timed(name, function, measure=None):
+    '''
+    Version of "function" that adds its duration to "stats"
+    '''
+
+    stat = stats.setdefault(name, Stat())
+
+    @wraps(function)
+    def wrapper(*args, **kwargs):
+        start = time.perf_counter()
+        result = function(*args, **kwargs)
+        elapsed = time.perf_counter() - start
+
+        if measure is None:
+            stat.add(elapsed)
+        else:
+            stat.add(elapsed, *measure(args, result))
+
+        return result
+
+    return wrapper
+
+
+# ###### Switching it on and off
+
+
+def swap_handler(old, new):
+    '''
+    Replaces a function registered as depsgraph handler keeping its place
+    '''
+
+    handlers = bpy.app.handlers.depsgraph_update_pre
+
+    if old in handlers:
+        handlers[handlers.index(old)] = new
+
+
+def enable():
+    '''
+    Starts timing the functions in "get_targets" and the slider functions
+    '''
+
+    global enabled
+
+    if enabled:
+        return
+
+    for module, name, measure in get_targets():
+        function = getattr(module, name)
+        originals[(module, name)] = function
+        setattr(module, name, timed(name, function, measure))
+
+    for slider_type, (slider, slider_array, arg_names) in slider_tools.sliders.items():
+        original_sliders[slider_type] = (slider, slider_array, arg_names)
+
+        if slider_array is not None:
+            slider_array = timed('%s (array)' % slider_type, slider_array, count_kernel)
+
+        slider_tools.sliders[slider_type] = (timed(slider_type, slider, count_item), slider_array, arg_names)
+
+    swap_handler(originals[(magnet, 'anim_transform_handlers')], magnet.anim_transform_handlers)
+
+    enabled = True
+
+
+def disable():
+    '''
+    Puts the original functions back
+    '''
+
+    global enabled
+
+    if not enabled:
+        return
+
+    swap_handler(magnet.anim_transform_handlers, originals[(magnet, 'anim_transform_handlers')])
+
+    for (module, name), function in originals.items():
+        setattr(module, name, function)
+
+    slider_tools.sliders.update(original_sliders)
+
+    originals.clear()
+    original_sliders.clear()
+
+    enabled = False
+
+
+def reset():
+    '''
+    Forgets the timings taken so far
+    '''
+
+    for stat in stats.values():
+        stat.__init__()
+
+
+def get_report():
+    '''
+    Timings of every function that was called, slowest first
+    '''
+
+    report = [(name, stat.as_dict()) for name, stat in stats.items() if stat.calls]
+    report.sort(key=lambda item: item[1]['total_ms'], reverse=True)
+
+    return report
+
+
+def dump(filepath):
+    '''
+    Writes the timings to a JSON file
+    '''
+
+    data = {'blender': '.'.join(str(number) for number in bpy.app.version),
+            'numpy': slider_tools.np is not None,
+            'stats': dict(get_report())}
+
+    with open(filepath, 'w') as file:
+        json.dump(data, file, indent=2)
@@ -1,6 +1,6 @@
 import bpy
 
-from . import key_utils, cur_utils, utils
+from . import cur_utils, utils, magnet
 
 from bpy.props import StringProperty, BoolProperty, EnumProperty, \
     IntProperty, FloatProperty, PointerProperty, CollectionProperty
@@ -48,6 +48,13 @@ def update_clone_move(self, context):
     return
 
 
+def update_mask(self, context):
+    # rebuild the anim_transform mask when one of its properties is changed
+
+    if self.use_mask:
+        magnet.update_anim_trans_mask()
+
+
 def update_overshoot(self, context):
     # change values when overshoot property is changed
 
@@ -62,7 +69,6 @@ def update_overshoot(self, context):
 def update_selector(self, context):
     # change values when selector property is changed
 
-    key_utils.get_sliders_globals()
     self.overshoot = False
     self.modal_switch = False
 
@@ -73,18 +79,25 @@ class AnimAideAnimTransform(PropertyGroup):
 
     use_mask: BoolProperty()
 
+    deferred: BoolProperty(default=False,
+                           description='Modify the keys once the transformation is done instead of while dragging')
+
     # use_markers: BoolProperty(default=True,
     #                           description='Let you choose to use markers for the mask',
     #                           update=toggle_anim_trans_markers)
 
     mask_margin_l: IntProperty(default=0,
-                               description="Margin for the mask")
+                               description="Margin for the mask",
+                               update=update_mask)
     mask_blend_l: IntProperty(default=0, max=0,
-                              description="Fade value for the left margin")
+                              description="Fade value for the left margin",
+                              update=update_mask)
     mask_margin_r: IntProperty(default=0,
-                               description="Margin for the mask")
+                               description="Margin for the mask",
+                               update=update_mask)
     mask_blend_r: IntProperty(default=0, min=0,
-                              description="Fade value for the right margin")
+                              description="Fade value for the right margin",
+                              update=update_mask)
 
     mask_blend_mapping: FloatProperty()
 
@@ -95,7 +108,8 @@ class AnimAideAnimTransform(PropertyGroup):
                ('QUART', ' ', 'Curve Slope 4', 'IPO_QUART', 4),
                ('QUINT', ' ', 'Curve Slope 5', 'IPO_QUINT', 5)],
         name="Interpolation",
-        default='SINE'
+        default='SINE',
+        update=update_mask
     )
 
     easing: EnumProperty(
@@ -103,7 +117,8 @@ class AnimAideAnimTransform(PropertyGroup):
                ('EASE_IN_OUT', 'Smooth', 'Sets Mask transition type', 'SMOOTHCURVE', 2),
                ('EASE_OUT', 'Round', 'Sets Mask transition type', 'INVERSESQUARECURVE', 3)],
         name="Easing",
-        default='EASE_IN_OUT'
+        default='EASE_IN_OUT',
+        update=update_mask
     )
 
 
@@ -143,6 +158,30 @@ class AnimSlider(PropertyGroup):
     affect_non_selected_keys: BoolProperty(default=False,
                                            description='Affect non-selected keys when cursor is over them')
 
+    throttle: BoolProperty(default=True,
+                           description='While sliding, merge mouse movements and apply them at most once per screen refresh')
+
+    refresh_rate: IntProperty(default=60,
+                              min=1,
+                              max=240,
+                              description='Maximum number of slider updates per second when limited')
+
+    curve_table: BoolProperty(default=False,
+                              description='While sliding, read the Ease To Ease and Blend Ease curves from a '
+                                          'precomputed table. Faster on many keys, slightly less precise')
+
+    preview: BoolProperty(default=False,
+                          description='While sliding, only update the keys in the visible frames of the Graph '
+                                      'Editor. The rest get updated when the slider is released')
+
+    update_on_release: BoolProperty(default=False,
+                                    description='While sliding, move the handles along with their keys and '
+                                                'recalculate the fcurves only when the slider is released')
+
+    sliced_commit: BoolProperty(default=False,
+                                description='Apply the sliders to many fcurves a few at a time, so Blender '
+                                            'keeps responding while they are modified')
+
     min_value: FloatProperty(default=-1)
 
     max_value: FloatProperty(default=1)
@@ -1,403 +1,468 @@
 import bpy
+import time
 
-import random as rd
+from functools import partial
 
-from . import utils, key_utils, cur_utils
+from . import utils, key_utils, cur_utils, curve_math
 
+try:
+    import numpy as np
+except ImportError:
+    np = None
 
-# Sliders global variables
 
-fcurve = None
-global_fcurve = None
-selected_keys = None
-original_values = None
-left_neighbor = None
-right_neighbor = None
-min_value = None
-max_value = None
+# ###### Sliders key by key
+# Used when numpy is not available. They get the "PlanItem" of the fcurve and change its "keys" one
+# by one, running the "curve_math" kernels on numbers instead of arrays
 
 
-def s_div(n, d):
-    return n / d if d else 0
+def apply_keys(item, factor, limits, *args, kernel, per_key=()):
+    '''
+    Runs a "curve_math" kernel on each key of a "PlanItem". "per_key" are the positions of the
+    arguments with a value per key of the fcurve
+    '''
+    snapshot = item.snapshot
 
+    for index in item.keys:
+        k = item.fcurve.keyframe_points[index]
+        lh_delta = k.co.y - k.handle_left.y
+        rh_delta = k.co.y - k.handle_right.y
 
-def update_keyframe_points(context):
-    """# The select operator(s) are bugged, and can fail to update selected keys, so"""
-    area = context.area.type
-    if area != 'GRAPH_EDITOR':
-        context.area.type = 'GRAPH_EDITOR'
+        key_args = [arg[index] if i in per_key else arg for i, arg in enumerate(args)]
 
-    bpy.ops.transform.transform()
+        k.co.y = kernel(snapshot.x[index], snapshot.y[index], factor, item.left_neighbor, item.right_neighbor,
+                        limits, *key_args)
 
-    if area != 'GRAPH_EDITOR':
-        context.area.type = area
+        key_utils.set_handles(k, lh_delta, rh_delta)
 
 
-def ease_to_ease(factor, slope):
+def time_offset(item, factor, limits, curve, cycle_before, cycle_after):
     '''
-    Transition selected keys from the neighboring ones in an "S" shape manner (ease-in and ease-out simultaneously)
+    Shift the value of selected keys to the ones of the left or right in the same fcurve
     '''
-    clamped_factor = utils.clamp(-factor, min_value, max_value)
+    # factor = (self.factor/2) + 0.5
+    fcurve = item.fcurve
+    fcurves = fcurve.id_data.fcurves
 
-    local_y = right_neighbor['y'] - left_neighbor['y']
-    local_x = right_neighbor['x'] - left_neighbor['x']
+    clone_name = '%s.%d.clone' % (fcurve.data_path, fcurve.array_index)
+    clone = cur_utils.duplicate_from_data(fcurves,
+                                          curve,
+                                          clone_name,
+                                          before=cycle_before,
+                                          after=cycle_after)
 
-    for index in selected_keys:
+    clamped_factor = utils.clamp(factor, *limits)
 
+    for index in item.keys:
         k = fcurve.keyframe_points[index]
         lh_delta = k.co.y - k.handle_left.y
         rh_delta = k.co.y - k.handle_right.y
-        x = k.co.x - left_neighbor['x']
 
-        key_ratio = s_div(1, (s_div(local_x, x)))
+        k.co.y = clone.evaluate(k.co.x - 20 * clamped_factor)
 
-        clamped_move = utils.clamp(clamped_factor, minimum=key_ratio - 1, maximum=key_ratio)
+        key_utils.set_handles(k, lh_delta, rh_delta)
 
-        ease_y = cur_utils.s_curve(key_ratio, slope=slope, xshift=clamped_move)
+    fcurves.remove(clone)
 
-        k.co.y = left_neighbor['y'] + local_y * ease_y
 
-        key_utils.set_handles(k, lh_delta, rh_delta)
+# ###### Sliders on arrays
 
 
-def ease(factor, slope):
+def apply_array(item, factor, limits, *args, kernel, per_key=()):
     '''
-    Transition selected keys from the neighboring ones in a "C" shape manner (ease-in or ease-out)
+    Runs a "curve_math" kernel on the keys of a "PlanItem" and writes them back in bulk with
+    "foreach_get" and "foreach_set". "per_key" are the positions of the arguments with a value per
+    selected key
     '''
-    clamped_factor = utils.clamp(factor, min_value, max_value)
 
-    local_y = right_neighbor['y'] - left_neighbor['y']
-    local_x = right_neighbor['x'] - left_neighbor['x']
+    fcurve = item.fcurve
+    snapshot = item.snapshot
 
-    new_slope = 1 + ((slope * 2) * abs(clamped_factor))
+    co, handle_left, handle_right = key_utils.get_key_coords(fcurve)
 
-    if factor < 0:
-        height = 2
-        width = 2
-        yshift = 0
-        xshift = 0
-    else:
-        height = 2
-        width = 2
-        xshift = -1
-        yshift = -1
+    indexes = item.keys
 
-    for index in selected_keys:
+    if len(indexes) < len(snapshot.selected_keys):
+        # previewing: the per key arguments only keep the keys in view
+        positions = np.searchsorted(snapshot.selected_keys, indexes)
+        args = tuple(arg[positions] if i in per_key else arg for i, arg in enumerate(args))
 
-        k = fcurve.keyframe_points[index]
-        lh_delta = k.co.y - k.handle_left.y
-        rh_delta = k.co.y - k.handle_right.y
-        x = k.co.x - left_neighbor['x']
+    x = snapshot.x[indexes].astype(np.float64)
+    y = snapshot.y[indexes].astype(np.float64)
 
-        key_ratio = s_div(1, (s_div(local_x, x)))
+    new_y = kernel(x, y, factor, item.left_neighbor, item.right_neighbor, limits, *args)
 
-        ease_y = cur_utils.s_curve(key_ratio,
-                                   slope=new_slope,
-                                   width=width,
-                                   height=height,
-                                   xshift=xshift,
-                                   yshift=yshift)
+    # Handles move along with their key. Automatic ones get recalculated by "fcurve.update()" anyway
+    delta = new_y - co[indexes, 1]
+    co[indexes, 1] = new_y
+    handle_left[indexes, 1] += delta
+    handle_right[indexes, 1] += delta
 
-        k.co.y = left_neighbor['y'] + local_y * ease_y.real
+    key_utils.set_key_coords(fcurve, co, handle_left, handle_right)
 
-        key_utils.set_handles(k, lh_delta, rh_delta)
 
+# ###### Work Plan
 
-def blend_neighbor(factor):
-    '''
-    Blend selected keys to the value of the neighboring left and right keys
-    '''
-    for index in selected_keys:
+# slider type: (key by key function, "curve_math" kernel, extra arguments after the factor)
+sliders = {
+    'EASE_TO_EASE': (partial(apply_keys, kernel=curve_math.ease_to_ease), curve_math.ease_to_ease,
+                     ('slope', 'tabulated')),
+    'EASE': (partial(apply_keys, kernel=curve_math.ease), curve_math.ease, ('slope',)),
+    'BLEND_NEIGHBOR': (partial(apply_keys, kernel=curve_math.blend_neighbor), curve_math.blend_neighbor, ()),
+    'BLEND_FRAME': (partial(apply_keys, kernel=curve_math.blend_frame), curve_math.blend_frame,
+                    ('left_y_ref', 'right_y_ref')),
+    'BLEND_EASE': (partial(apply_keys, kernel=curve_math.blend_ease), curve_math.blend_ease,
+                   ('slope', 'tabulated')),
+    'BLEND_OFFSET': (partial(apply_keys, kernel=curve_math.blend_offset), curve_math.blend_offset,
+                     ('first_y', 'last_y')),
+    'TWEEN': (partial(apply_keys, kernel=curve_math.tween), curve_math.tween, ()),
+    'PUSH_PULL': (partial(apply_keys, kernel=curve_math.push_pull), curve_math.push_pull, ()),
+    'SCALE_LEFT': (partial(apply_keys, kernel=partial(curve_math.scale, scale_type='L')),
+                   partial(curve_math.scale, scale_type='L'), ()),
+    'SCALE_RIGHT': (partial(apply_keys, kernel=partial(curve_math.scale, scale_type='R')),
+                    partial(curve_math.scale, scale_type='R'), ()),
+    'SCALE_AVERAGE': (partial(apply_keys, kernel=partial(curve_math.scale, scale_type='')),
+                      partial(curve_math.scale, scale_type=''), ('average_y',)),
+    'SMOOTH': (partial(apply_keys, kernel=curve_math.smooth), curve_math.smooth, ('smooth_y',)),
+    'TIME_OFFSET': (time_offset, curve_math.time_offset, ('curve', 'cycle_before', 'cycle_after')),
+    'NOISE': (partial(apply_keys, kernel=curve_math.noise), curve_math.noise, ('noise_values',)),
+}
 
-        k = fcurve.keyframe_points[index]
-        lh_delta = k.co.y - k.handle_left.y
-        rh_delta = k.co.y - k.handle_right.y
+# arguments with a value per key. The kernels get only the ones of the selected keys
+per_key_args = ('smooth_y', 'noise_values')
 
-        if factor < 0:
-            delta = left_neighbor['y'] - original_values[index]['y']
-        else:
-            delta = right_neighbor['y'] - original_values[index]['y']
 
-        clamped_factor = utils.clamp(abs(factor), 0, max_value)
+class PlanItem:
+    '''
+    Everything a slider needs to modify one fcurve, resolved once before the sliding starts.
+    "keys" are the keys to modify: all the affected ones, or the ones in view while previewing
+    '''
 
-        k.co.y = original_values[index]['y'] + delta * clamped_factor
+    __slots__ = ('fcurve', 'snapshot', 'left_neighbor', 'right_neighbor', 'kernel', 'args', 'keys')
 
-        key_utils.set_handles(k, lh_delta, rh_delta)
+    def __init__(self, fcurve, snapshot, kernel, args, keys=None):
+        self.fcurve = fcurve
+        self.snapshot = snapshot
+        self.left_neighbor = snapshot.get_neighbor(snapshot.left_neighbor)
+        self.right_neighbor = snapshot.get_neighbor(snapshot.right_neighbor)
+        self.kernel = kernel
+        self.args = args
+        self.keys = snapshot.selected_keys if keys is None else keys
 
 
-def blend_frame(factor, left_y_ref, right_y_ref):
+def get_plan(self, context):
     '''
-    Blend selected keys to the value of the chosen left and right frames
+    List of the fcurves the slider will modify, each one with its snapshot and slider function
     '''
-    for index in selected_keys:
 
-        k = fcurve.keyframe_points[index]
-        lh_delta = k.co.y - k.handle_left.y
-        rh_delta = k.co.y - k.handle_right.y
+    settings = self.settings
 
-        if factor < 0:
-            delta = left_y_ref - original_values[index]['y']
-        else:
-            delta = right_y_ref - original_values[index]['y']
+    slider, slider_array, arg_names = sliders[self.slider_type]
 
-        clamped_factor = utils.clamp(abs(factor), 0, max_value)
+    use_arrays = np is not None and slider_array is not None
+    per_key = tuple(i for i, name in enumerate(arg_names) if name in per_key_args)
 
-        k.co.y = original_values[index]['y'] + delta * clamped_factor
+    if use_arrays:
+        kernel = partial(apply_array, kernel=slider_array, per_key=per_key)
+    elif per_key:
+        kernel = partial(slider, per_key=per_key)
+    else:
+        kernel = slider
 
-        key_utils.set_handles(k, lh_delta, rh_delta)
+    if settings.show_only_selected is True:
+        objects = context.selected_objects
+    else:
+        objects = context.scene.objects
 
+    scene_values = key_utils.get_scene_values(context.scene)
+    plan = []
 
-def blend_ease(factor, slope):
-    '''
-    Blend selected keys to an ease-in or ease-out curve using the neighboring keys
-    '''
-    local_y = right_neighbor['y'] - left_neighbor['y']
-    local_x = right_neighbor['x'] - left_neighbor['x']
+    for obj in objects:
 
-    for index in selected_keys:
+        if not key_utils.valid_anim(obj):
+            continue
 
-        k = fcurve.keyframe_points[index]
-        lh_delta = k.co.y - k.handle_left.y
-        rh_delta = k.co.y - k.handle_right.y
-        x = k.co.x - left_neighbor['x']
+        visible = obj.visible_get()
+
+        if not settings.show_hidden and not visible:
+            continue
 
-        if factor < 0:
-            clamped_factor = utils.clamp(1 + factor * 2, min_value, max_value)
+        fcurves = obj.animation_data.action.fcurves
+        snapshots = scene_values.get(obj.name, {})
+        usable_bones = key_utils.get_usable_bones(settings, obj) if obj.type == 'ARMATURE' else None
 
-            key_ratio = s_div(1, (s_div(local_x, x)))
+        for fcurve_index, fcurve in fcurves.items():
 
-            ease_y = cur_utils.s_curve(key_ratio,
-                                       slope=1 + (slope),  # self.slope * 2,
-                                       width=2,
-                                       height=2,
-                                       xshift=0,
-                                       yshift=0)
-        else:
-            clamped_factor = utils.clamp(1 - factor * 2, min_value, max_value)
+            if not key_utils.poll_fcurve(settings, obj, fcurve, usable_bones):
+                continue
 
-            key_ratio = s_div(1, (s_div(local_x, x)))
+            snapshot = snapshots.get(fcurve_index)
 
-            ease_y = cur_utils.s_curve(key_ratio,
-                                       slope=1 + (slope),  # self.slope * 2,
-                                       width=2,
-                                       height=2,
-                                       xshift=-1,
-                                       yshift=-1)
+            if snapshot is None or not len(snapshot.selected_keys):
+                continue
 
-        clamped_move = utils.clamp(clamped_factor,
-                                   minimum=key_ratio - 1,
-                                   maximum=key_ratio)
+            selected_keys = snapshot.selected_keys
 
-        blend = cur_utils.s_curve(key_ratio,
-                                  slope=1.3,
-                                  # xshift=clamped_move)
-                                  width=2,
-                                  height=2,
-                                  xshift=clamped_move - 1,
-                                  yshift=-1)
+            values = {'slope': self.slope,
+                      'tabulated': settings.curve_table,
+                      'left_y_ref': snapshot.left_y_ref,
+                      'right_y_ref': snapshot.right_y_ref,
+                      'first_y': snapshot.y[selected_keys[0]],
+                      'last_y': snapshot.y[selected_keys[-1]],
+                      'curve': snapshot,
+                      'smooth_y': snapshot.smooth_y,
+                      'cycle_before': settings.cycle_before,
+                      'cycle_after': settings.cycle_after}
 
-        clamped_factor = utils.clamp(abs(factor), 0, max_value)
+            if 'noise_values' in arg_names:
+                # one noise per fcurve and "noise_phase", computed only once for the whole drag
+                values['noise_values'] = curve_math.gradient_noise(snapshot.x,
+                                                                   settings.noise_phase + fcurve_index)
 
-        delta = (left_neighbor['y'] + local_y * ease_y.real) - original_values[index]['y']
+            if 'average_y' in arg_names:
+                if np is None:
+                    values['average_y'] = sum(snapshot.y[index] for index in selected_keys) / len(selected_keys)
+                else:
+                    values['average_y'] = snapshot.y[selected_keys].mean(dtype=np.float64)
 
-        # k.co.y = original_values[index]['y'] + delta * blend.real
-        k.co.y = original_values[index]['y'] + delta * clamped_factor
+            if use_arrays:
+                for name in per_key_args:
+                    if name in arg_names:
+                        values[name] = values[name][snapshot.selected_keys]
 
-        key_utils.set_handles(k, lh_delta, rh_delta)
+            args = tuple(values[name] for name in arg_names)
 
+            plan.append(PlanItem(fcurve, snapshot, kernel, args))
 
-def blend_offset(factor):
+    return plan
+
+
+def get_visible_plan(plan, start, end):
     '''
-    Blend selected keys to the value of the chosen left and right frames
+    Part of the plan between the frames "start" and "end": the fcurves with affected keys in that
+    range, each one limited to those keys
     '''
-    clamped_factor = utils.clamp(factor, min_value, max_value)
-
-    first_key_index = selected_keys[0]
-    last_key_index = selected_keys[-1]
 
-    if first_key_index is None or last_key_index is None:
-        return
+    visible = []
 
-    if clamped_factor > 0:
-        delta = right_neighbor['y'] - original_values[last_key_index]['y']
-    else:
-        delta = original_values[first_key_index]['y'] - left_neighbor['y']
+    for item in plan:
+        snapshot = item.snapshot
+        frames = key_utils.KeyIndex(snapshot.x).keys_in_range(start, end)
+        keys = snapshot.selected_keys
 
-    for index in selected_keys:
-        k = fcurve.keyframe_points[index]
-        lh_delta = k.co.y - k.handle_left.y
-        rh_delta = k.co.y - k.handle_right.y
+        if np is None:
+            keys = [index for index in keys if index in frames]
+        else:
+            keys = keys[(keys >= frames.start) & (keys < frames.stop)]
 
-        k.co.y = original_values[index]['y'] + delta * clamped_factor
+        if len(keys):
+            visible.append(PlanItem(item.fcurve, snapshot, item.kernel, item.args, keys))
 
-        key_utils.set_handles(k, lh_delta, rh_delta)
+    return visible
 
 
-def tween(factor):
+def get_view_frames(context):
     '''
-    Set lineal relative value of the selected keys in relationship to the neighboring ones
+    First and last frame shown in the Graph Editor, None if there is no Graph Editor
     '''
-    clamped_factor = utils.clamp(factor, min_value, max_value)
 
-    local_y = right_neighbor['y'] - left_neighbor['y']
-    delta = local_y / 2
-    mid = left_neighbor['y'] + delta
+    area = context.area
 
-    for index in selected_keys:
-        k = fcurve.keyframe_points[index]
-        lh_delta = k.co.y - k.handle_left.y
-        rh_delta = k.co.y - k.handle_right.y
+    if area is None or area.type != 'GRAPH_EDITOR':
+        return None
 
-        k.co.y = mid + delta * clamped_factor
+    for region in area.regions:
+        if region.type == 'WINDOW':
+            start = region.view2d.region_to_view(0, 0)[0]
+            end = region.view2d.region_to_view(region.width, 0)[0]
+            return start, end
+
+    return None
 
-        key_utils.set_handles(k, lh_delta, rh_delta)
 
+# ###### Commit in slices
+# Applying a slider to a huge amount of fcurves at once freezes Blender until it is done. With the
+# "sliced_commit" option, plans of at least "min_sliced_fcurves" fcurves are applied from a timer a
+# few fcurves at a time, working at most "slice_budget" seconds per call
 
-def push_pull(factor):
+pending_commit = None       # SlicedCommit being applied
+
+min_sliced_fcurves = 100
+slice_budget = 0.02         # seconds of work per timer call
+slice_interval = 0.01       # seconds between timer calls, for Blender to handle events and redraw
+
+
+class SlicedCommit:
     '''
-    Exagerates or decreases the value of the selected keys
+    Plan applied by "sliced_commit_timer" with the factor it had when the slider was released
     '''
-    clamped_factor = utils.clamp(factor, min_value, max_value)
 
-    for index in selected_keys:
-        k = fcurve.keyframe_points[index]
-        lh_delta = k.co.y - k.handle_left.y
-        rh_delta = k.co.y - k.handle_right.y
+    __slots__ = ('plan', 'factor', 'limits', 'label', 'done', 'actions')
 
-        average_y = key_utils.linear_y(left_neighbor, right_neighbor, k)
-        if average_y is None:
-            continue
-        delta = original_values[index]['y'] - average_y
+    def __init__(self, plan, factor, limits, label):
+        self.plan = plan
+        self.factor = factor
+        self.limits = limits
+        self.label = label
+        self.done = 0
+        self.actions = set()
 
-        k.co.y = original_values[index]['y'] + delta * clamped_factor
+    @property
+    def progress(self):
+        return self.done / len(self.plan) if self.plan else 1.0
 
-        key_utils.set_handles(k, lh_delta, rh_delta)
+    def apply(self, budget=None):
+        '''
+        Applies the next fcurves of the plan until "budget" seconds pass (all of them if None).
+        Returns True once the whole plan is applied
+        '''
+
+        start = time.perf_counter()
+        plan = self.plan
+
+        while self.done < len(plan):
+            item = plan[self.done]
+            item.kernel(item, self.factor, self.limits, *item.args)
+
+            key_utils.update_fcurve(item.fcurve)
+            self.actions.add(item.fcurve.id_data)
+            self.done += 1
+
+            if budget is not None and time.perf_counter() - start >= budget:
+                break
 
+        return self.done == len(plan)
 
-def smooth(factor):
+
+def use_sliced_commit(context, plan):
+    return context.scene.animaide.slider.sliced_commit and len(plan) >= min_sliced_fcurves
+
+
+def tag_graph_editors():
+    for window in bpy.context.window_manager.windows:
+        for area in window.screen.areas:
+            if area.type == 'GRAPH_EDITOR':
+                area.tag_redraw()
+
+
+def start_sliced_commit(self, plan):
     '''
-    Averages values of selected keys creating a smoother fcurve
+    Applies the plan from a timer with the current factor of the slider operator
     '''
-    # factor = (self.factor/2) + 0.5
 
-    clamped_factor = utils.clamp(factor, min_value, max_value)
-    # print('first: ', selected_keys[0])
-    # print('original: ', original_values[selected_keys[0]]['sy'])
+    global pending_commit
 
-    for index in selected_keys:
+    finish_sliced_commit()
 
-        k = fcurve.keyframe_points[index]
-        lh_delta = k.co.y - k.handle_left.y
-        rh_delta = k.co.y - k.handle_right.y
+    limits = (self.settings.min_value, self.settings.max_value)
+    pending_commit = SlicedCommit(plan, self.factor, limits, self.bl_label)
 
-        if 'sy' not in original_values[index]:
-            continue
+    for handlers in (bpy.app.handlers.undo_pre, bpy.app.handlers.redo_pre, bpy.app.handlers.load_pre):
+        if drop_sliced_commit not in handlers:
+            handlers.append(drop_sliced_commit)
 
-        smooth_y = original_values[index]['sy']
-        # print('smooth_y: ', smooth_y)
+    bpy.app.timers.register(sliced_commit_timer)
 
-        if smooth_y == 'book end':
-            # print('bookend')
-            delta = 0
-        else:
-            delta = original_values[index]['y'] - smooth_y
 
-        k.co.y = original_values[index]['y'] - delta * clamped_factor * 0.5
+def sliced_commit_timer():
+    if pending_commit is None:
+        return None
 
-        key_utils.set_handles(k, lh_delta, rh_delta)
+    if not pending_commit.apply(slice_budget):
+        tag_graph_editors()
+        return slice_interval
 
+    end_sliced_commit()
 
-def time_offset(factor, fcurves):
+    return None
+
+
+def end_sliced_commit(undo=True):
     '''
-    Shift the value of selected keys to the ones of the left or right in the same fcurve
+    Closes a commit that is done: tags its actions and adds the undo step
     '''
-    # factor = (self.factor/2) + 0.5
-    animaide = bpy.context.scene.animaide
-    cycle_before = animaide.clone.cycle_before
-    cycle_after = animaide.clone.cycle_after
 
-    clone_name = '%s.%d.clone' % (fcurve.data_path, fcurve.array_index)
-    clone = cur_utils.duplicate_from_data(fcurves,
-                                          global_fcurve,
-                                          clone_name,
-                                          before=cycle_before,
-                                          after=cycle_after)
+    global pending_commit
 
-    clamped_factor = utils.clamp(factor, min_value, max_value)
+    commit = pending_commit
+    pending_commit = None
 
-    for index in selected_keys:
-        k = fcurve.keyframe_points[index]
-        lh_delta = k.co.y - k.handle_left.y
-        rh_delta = k.co.y - k.handle_right.y
+    remove_commit_handlers()
 
-        k.co.y = clone.evaluate(k.co.x - 20 * clamped_factor)
+    key_utils.tag_actions(bpy.context, commit.actions)
+    key_utils.forget_snapshots(item.fcurve for item in commit.plan)
 
-        key_utils.set_handles(k, lh_delta, rh_delta)
+    # the snapshots have the values from before the commit. The next slider takes new ones
+    key_utils.global_values.clear()
 
-    fcurves.remove(clone)
+    tag_graph_editors()
 
+    if undo:
+        bpy.ops.ed.undo_push(message=commit.label)
 
-def noise(factor, fcurves, fcurve_index, phase):
+
+def finish_sliced_commit(undo=True):
     '''
-    Set random values to the selected keys
+    Applies at once what is left of the commit in progress, if any
     '''
-    # factor = (self.factor/2) + 0.5
-    # animaide = bpy.context.scene.animaide
 
-    # clone_name = '%s.%d.clone' % (fcurve.data_path, fcurve.array_index)
-    clone_name = 'animaide'
-    clone = cur_utils.duplicate_from_data(fcurves,
-                                          global_fcurve,
-                                          clone_name)
+    if pending_commit is None:
+        return
 
-    # cur_utils.add_noise(clone, strength=1, scale=0.2, phase=rd.uniform(0, 1))
-    cur_utils.add_noise(clone, strength=1, scale=0.2, phase=phase + fcurve_index)
+    if bpy.app.timers.is_registered(sliced_commit_timer):
+        bpy.app.timers.unregister(sliced_commit_timer)
 
-    clamped_factor = utils.clamp(factor, min_value, max_value)
+    pending_commit.apply()
+    end_sliced_commit(undo)
 
-    for index in selected_keys:
-        k = fcurve.keyframe_points[index]
-        lh_delta = k.co.y - k.handle_left.y
-        rh_delta = k.co.y - k.handle_right.y
 
-        delta = clone.evaluate(k.co.x) - original_values[index]['y']
-        k.co.y = original_values[index]['y'] + delta * clamped_factor
+def cancel_sliced_commit(restore=True):
+    '''
+    Stops the commit in progress. With "restore" every fcurve of the plan gets back its snapshot values
+    '''
+
+    global pending_commit
 
-        key_utils.set_handles(k, lh_delta, rh_delta)
+    if bpy.app.timers.is_registered(sliced_commit_timer):
+        bpy.app.timers.unregister(sliced_commit_timer)
 
-    fcurves.remove(clone)
+    remove_commit_handlers()
+
+    commit = pending_commit
+    pending_commit = None
+
+    if commit is None or not restore:
+        return
 
+    restore_plan(commit.plan)
 
-def scale(factor, scale_type):
+    tag_graph_editors()
+
+
+def restore_plan(plan, update=True):
     '''
-    Increase or decrease the value of selected keys acording to the "scale_type"
-    L = use left neighboring key as anchor
-    R = use right neighboring key as anchor
-    Anything else =  use the average point as the anchor
+    Set the fcurves of the plan back to the values of their snapshots. "update" can be False if the
+    fcurves were not updated since the snapshot (see "key_utils.restore_fcurve")
     '''
 
-    clamped_factor = utils.clamp(factor, min_value, max_value)
+    for item in plan:
+        key_utils.restore_fcurve(item.fcurve, item.snapshot, update)
 
-    y = 0
-    for index in selected_keys:
-        y = y + original_values[index]['y']
-    y_average = y / len(selected_keys)
+    key_utils.tag_actions(bpy.context, {item.fcurve.id_data for item in plan})
 
-    for index in selected_keys:
-        k = fcurve.keyframe_points[index]
-        lh_delta = k.co.y - k.handle_left.y
-        rh_delta = k.co.y - k.handle_right.y
 
-        if scale_type == 'L':
-            delta = original_values[index]['y'] - left_neighbor['y']
-        elif scale_type == 'R':
-            delta = original_values[index]['y'] - right_neighbor['y']
-        else:
-            delta = original_values[index]['y'] - y_average
+def drop_sliced_commit(*args):
+    '''
+    Handler for undo and file loading: the fcurves of the plan are about to be replaced
+    '''
 
-        k.co.y = original_values[index]['y'] + delta * clamped_factor
+    cancel_sliced_commit(restore=False)
 
-        key_utils.set_handles(k, lh_delta, rh_delta)
+
+def remove_commit_handlers():
+    for handlers in (bpy.app.handlers.undo_pre, bpy.app.handlers.redo_pre, bpy.app.handlers.load_pre):
+        if drop_sliced_commit in handlers:
+            handlers.remove(drop_sliced_commit)
 
 
 # ###### Sliders Tools
@@ -452,9 +517,6 @@ def looper(self, context):
     Common actions used in the "execute" of the different slider operators
     '''
 
-    global min_value, max_value, global_fcurve, selected_keys
-    global original_values, left_neighbor, right_neighbor, fcurve
-
     animaide = context.scene.animaide
 
     if self.slot_index == -1:
@@ -462,146 +524,80 @@ def looper(self, context):
     else:
         slider = animaide.slider_slots[self.slot_index]
 
-    if self.op_context == 'EXEC_DEFAULT':
+    if self.op_context == 'EXEC_DEFAULT' or self.plan is None:
+        finish_sliced_commit()
+
+        self.settings = key_utils.get_settings(context, slider)
         key_utils.get_sliders_globals(left_frame=slider.left_ref_frame,
-                                      right_frame=slider.right_ref_frame)
+                                      right_frame=slider.right_ref_frame,
+                                      settings=self.settings)
+        self.plan = get_plan(self, context)
 
-    # slider.factor = self.factor
-    # slider.factor_overshoot = self.factor
+        if self.op_context == 'EXEC_DEFAULT' and use_sliced_commit(context, self.plan):
+            start_sliced_commit(self, self.plan)
+            # not FINISHED, or the operator would add an undo step before the keys change. The only
+            # step is added by "end_sliced_commit"
+            return {'CANCELLED'}
 
-    min_value = slider.min_value
-    max_value = slider.max_value
+    limits = (self.settings.min_value, self.settings.max_value)
 
-    if context.space_data.dopesheet.show_only_selected is True:
-        objects = context.selected_objects
+    if self.preview_plan is None:
+        plan = self.plan
     else:
-        objects = context.scene.objects
-
-    # selected_pose_bones = bpy.context.selected_pose_bones
-    # usable_bones_names = []
-
-    for obj in objects:
-        # anim = obj.animation_data
+        plan = self.preview_plan
 
-        if not key_utils.valid_anim(obj):
-            continue
-
-        visible = obj.visible_get()
-
-        if not context.space_data.dopesheet.show_hidden and not visible:
-            continue
-
-        # if obj.type == 'ARMATURE':
-        #     selected_bones = context.selected_pose_bones
-        #     bones_names = [bone.name for bone in selected_bones]
-
-        # if obj.type == 'ARMATURE':
-        #     usable_bones_names = utils.get_usable_bone(obj, selected_pose_bones)
-
-        fcurves = obj.animation_data.action.fcurves
-
-        for fcurve_index, fcurve in fcurves.items():
-
-            if not key_utils.valid_fcurve(fcurve):
-                continue
-
-            if obj.type == 'ARMATURE':
-                # bone_name = utils.get_bone_name(fcurve, usable_bones_names)
-                # bone_name = utils.get_bone_name(obj, fcurve)
-                #
-
-                if getattr(fcurve.group, 'name', None) == 'Object Transforms':
-                    # When animating an object, by default its fcurves grouped with this name.
-                    continue
-                elif not fcurve.group:
-                    transforms = (
-                        'location', 'rotation_euler', 'scale',
-                        'rotation_quaternion', 'rotation_axis_angle',
-                        '[\"',  # custom property
-                    )
-                    if fcurve.data_path.startswith(transforms):
-                        # fcurve belongs to the  object, so skip it
-                        continue
-
-                # if fcurve.group.name not in bones_names:
-                #     continue
-
-                split_data_path = fcurve.data_path.split(sep='"')
-                bone_name = split_data_path[1]
-                bone = obj.data.bones.get(bone_name)
-
-                only_selected = context.space_data.dopesheet.show_only_selected
-
-                if bone is None or bone.hide or (only_selected and not bone.select):
-                    continue
-
-                # if bone_name is None:
-                #     continue
-
-            if getattr(fcurve.group, 'name', None) == cur_utils.group_name:
-                continue  # we don't want to select keys on reference fcurves
-
-            global_fcurve = key_utils.global_values[obj.name][fcurve_index]
-            selected_keys = global_fcurve['selected_keys']
-
-            if not selected_keys:
-                continue
-
-            original_values = global_fcurve['original_values']
-            left_neighbor = global_fcurve['left_neighbor']
-            right_neighbor = global_fcurve['right_neighbor']
-
-            if self.slider_type == 'EASE_TO_EASE':
-                ease_to_ease(self.factor, self.slope)
+    for item in plan:
+        item.kernel(item, self.factor, limits, *item.args)
 
-            elif self.slider_type == 'EASE':
-                ease(self.factor, self.slope)
+        if not self.defer_update:
+            key_utils.update_fcurve(item.fcurve)
+        elif np is None:
+            # the key by key sliders only move free and aligned handles
+            key_utils.follow_handles(item.fcurve, item.snapshot, item.keys)
 
-            elif self.slider_type == 'BLEND_NEIGHBOR':
-                blend_neighbor(self.factor)
+    key_utils.tag_actions(context, {item.fcurve.id_data for item in plan})
+    key_utils.forget_snapshots(item.fcurve for item in plan)
 
-            elif self.slider_type == 'BLEND_FRAME':
-                ref = key_utils.global_values[obj.name][fcurve_index]['ref_frames']
-                left_y_ref = ref['left_y']
-                right_y_ref = ref['right_y']
-                blend_frame(self.factor, left_y_ref, right_y_ref)
+    return {'FINISHED'}
 
-            elif self.slider_type == 'BLEND_EASE':
-                blend_ease(self.factor, self.slope)
 
-            elif self.slider_type == 'BLEND_OFFSET':
-                blend_offset(self.factor)
+def apply_factor(self, context, prop):
+    '''
+    Runs the slider with the latest factor, unless that factor is the one already applied
+    '''
 
-            elif self.slider_type == 'TWEEN':
-                tween(self.factor)
+    if self.factor == self.applied_factor:
+        return
 
-            elif self.slider_type == 'PUSH_PULL':
-                push_pull(self.factor)
+    prop.factor = self.factor
+    prop.factor_overshoot = self.factor
 
-            elif self.slider_type == 'SCALE_LEFT':
-                scale(self.factor, 'L')
+    self.execute(context)
 
-            elif self.slider_type == 'SCALE_RIGHT':
-                scale(self.factor, 'R')
+    self.applied_factor = self.factor
+    self.evaluations += 1
 
-            elif self.slider_type == 'SCALE_AVERAGE':
-                scale(self.factor, '')
+    context.area.header_text_set('Factor: %.2f    Evaluations: %d    Dropped: %d'
+                                 % (self.factor, self.evaluations, self.events - self.evaluations))
 
-            elif self.slider_type == 'SMOOTH':
-                smooth(self.factor)
 
-            elif self.slider_type == 'TIME_OFFSET':
-                time_offset(self.factor, fcurves)
+def end_modal(self, context, prop):
+    '''
+    Common actions used when the slider is confirmed or canceled
+    '''
 
-            elif self.slider_type == 'NOISE':
-                noise(self.factor, fcurves, fcurve_index, animaide.slider.noise_phase)
+    if self.timer is not None:
+        context.window_manager.event_timer_remove(self.timer)
+        self.timer = None
 
-            fcurve.update()
+    context.area.header_text_set(None)
 
-    #        message = "Factor: %f03" % animaide.sliders.factor
-    #        self.report({'INFO'}, "Factor:" + message)
+    if context.area.type == 'GRAPH_EDITOR':
+        context.area.tag_redraw()
 
-    return {'FINISHED'}
+    prop.modal_switch = False
+    prop.factor = 0.0
+    prop.factor_overshoot = 0.0
 
 
 def modal(self, context, event):
@@ -616,33 +612,47 @@ def modal(self, context, event):
 
     if event.type == 'MOUSEMOVE':  # Apply
 
-        slider_from_zero = (event.mouse_x - self.init_mouse_x) / 100
-        self.factor = slider_from_zero
+        self.factor = (event.mouse_x - self.init_mouse_x) / 100
+        self.events += 1
 
-        prop.factor = slider_from_zero
-        prop.factor_overshoot = slider_from_zero
+        # When throttled the latest factor waits for the next timer event
+        if self.timer is None:
+            apply_factor(self, context, prop)
 
-        self.execute(context)
+    elif event.type == 'TIMER':
+        apply_factor(self, context, prop)
 
     elif event.type == 'LEFTMOUSE':  # Confirm
-        if context.area.type == 'GRAPH_EDITOR':
-            context.area.tag_redraw()
-        key_utils.get_sliders_globals()
+        sliced = False
+
+        if self.preview_plan is None and not self.defer_update:
+            apply_factor(self, context, prop)
+        elif use_sliced_commit(context, self.plan):
+            # the timer applies the rest of the keys and the next slider takes the new snapshot
+            start_sliced_commit(self, self.plan)
+            sliced = True
+        else:
+            # one pass over everything, including the keys out of view, updating every fcurve
+            self.preview_plan = None
+            self.defer_update = False
+            self.execute(context)
 
-        prop.modal_switch = False
-        prop.factor = 0.0
-        prop.factor_overshoot = 0.0
+        end_modal(self, context, prop)
+
+        if sliced:
+            # the keys are only half applied: the undo step is added by "end_sliced_commit"
+            return {'CANCELLED'}
 
         return {'FINISHED'}
 
     elif event.type in {'RIGHTMOUSE', 'ESC'}:  # Cancel
-        if context.area.type == 'GRAPH_EDITOR':
-            context.area.tag_redraw()
-        key_utils.reset_original()
+        end_modal(self, context, prop)
 
-        prop.modal_switch = False
-        prop.factor = 0.0
-        prop.factor_overshoot = 0.0
+        # only the fcurves the slider changed
+        if self.preview_plan is None:
+            restore_plan(self.plan, update=not self.defer_update)
+        else:
+            restore_plan(self.preview_plan, update=not self.defer_update)
 
         return {'CANCELLED'}
 
@@ -654,11 +664,11 @@ def invoke(self, context, event):
     Common actions used in the "invoke" of the different slider operators
     '''
 
-    utils.update_keyframe_points(context)
-
     if self.op_context == 'EXEC_DEFAULT':
         return self.execute(context)
 
+    finish_sliced_commit()
+
     if self.slot_index == -1:
         slider = self.animaide.slider
         overshoot = slider.overshoot
@@ -676,10 +686,32 @@ def invoke(self, context, event):
     self.factor = 0.0
     self.init_mouse_x = event.mouse_x
 
+    self.settings = key_utils.get_settings(context, slider)
+
     key_utils.get_sliders_globals(left_frame=slider.left_ref_frame,
-                                  right_frame=slider.right_ref_frame)
+                                  right_frame=slider.right_ref_frame,
+                                  settings=self.settings)
+
+    self.plan = get_plan(self, context)
+
+    view_frames = get_view_frames(context)
+
+    if self.animaide.slider.preview and view_frames is not None:
+        self.preview_plan = get_visible_plan(self.plan, *view_frames)
+
+    self.defer_update = self.animaide.slider.update_on_release
 
     self.execute(context)
+
+    self.applied_factor = self.factor
+    self.events = 0
+    self.evaluations = 0
+
+    settings = self.animaide.slider
+    if settings.throttle:
+        interval = 1 / settings.refresh_rate
+        self.timer = context.window_manager.event_timer_add(interval, window=context.window)
+
     context.window_manager.modal_handler_add(self)
 
     return {'RUNNING_MODAL'}
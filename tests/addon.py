@@ -0,0 +1,127 @@
+'''
+The add-on loaded as the "animaide" package with the "bpy" stand-in of the benchmarks, so the tests
+run from plain Python:
+
+    python -m pytest tests
+'''
+
+import contextlib
+import importlib.util
+import os
+import sys
+
+root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+sys.path.insert(0, os.path.join(root, 'benchmarks'))
+
+import bpy_standin
+
+bpy = bpy_standin.install()
+
+import rigs
+
+
+def load_addon():
+    '''
+    Imports the add-on as the "animaide" package whatever the name of its folder
+    '''
+
+    spec = importlib.util.spec_from_file_location('animaide', os.path.join(root, '__init__.py'),
+                                                  submodule_search_locations=[root])
+    addon = importlib.util.module_from_spec(spec)
+    sys.modules['animaide'] = addon
+    spec.loader.exec_module(addon)
+
+    return addon
+
+
+animaide = load_addon()
+
+# modules with a version that works without numpy
+numpy_modules = (animaide.key_utils, animaide.curve_math, animaide.slider_tools, animaide.magnet)
+
+np = animaide.key_utils.np
+
+
+@contextlib.contextmanager
+def without_numpy():
+    '''
+    Runs the code used when numpy is not available
+    '''
+
+    for module in numpy_modules:
+        module.np = None
+
+    try:
+        yield
+    finally:
+        for module in numpy_modules:
+            module.np = np
+
+
+def make_context(objects, selected=None):
+    '''
+    Graph Editor context showing "objects", with the snapshots of earlier tests forgotten
+    '''
+
+    bpy.data.objects.clear()
+    bpy.data.actions.clear()
+
+    animaide.key_utils.clear_snapshots()
+    animaide.magnet.forget_anim_transform()
+
+    return bpy_standin.make_context(bpy, animaide.props.AnimAideScene, objects, selected)
+
+
+def make_object(name, values, frames=None):
+    '''
+    Object with its X location animated with one key per value, every 2 frames unless "frames" is given
+    '''
+
+    obj = bpy_standin.Object(name)
+    action = bpy_standin.Action('%sAction' % name)
+    obj.animation_data.action = action
+
+    fcurve = action.fcurves.new('location', index=0)
+    keys = fcurve.keyframe_points
+
+    for index, value in enumerate(values):
+        keys.insert(index * 2.0 if frames is None else frames[index], value)
+
+    fcurve.update()
+
+    return obj
+
+
+def run_timers():
+    '''
+    Calls the registered timers until all of them are done
+    '''
+
+    timers = bpy.app.timers.registered
+
+    while timers:
+        timer = timers[0]
+        if timer() is None and timer in timers:
+            timers.remove(timer)
+
+
+def get_keys(obj):
+    '''
+    Value and handles of every key of the object
+    '''
+
+    return [(key.co.y, key.handle_left.y, key.handle_right.y)
+            for fcurve in obj.animation_data.action.fcurves for key in fcurve.keyframe_points]
+
+
+def assert_keys_equal(test, keys, expected, places=5):
+    '''
+    Compares the results of "get_keys". Snapshots keep float32 values, as Blender does
+    '''
+
+    test.assertEqual(len(keys), len(expected))
+
+    for key, expected_key in zip(keys, expected):
+        for value, expected_value in zip(key, expected_key):
+            test.assertAlmostEqual(value, expected_value, places=places)
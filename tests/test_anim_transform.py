@@ -0,0 +1,177 @@
+import types
+import unittest
+from unittest import mock
+
+from addon import animaide, bpy, make_context, make_object, run_timers, without_numpy
+
+magnet = animaide.magnet
+
+
+class AnimTransformTest(unittest.TestCase):
+
+    def setUp(self):
+        self.obj = make_object('Cube', [0.0, 1.0, 3.0, 2.0, 0.5, 1.5, 4.0, 2.5, 1.0, 0.2, 3.0])
+        self.context = make_context([self.obj])
+        self.fcurve = self.obj.animation_data.action.fcurves[0]
+
+    def go_to_frame(self, frame):
+        # changing the frame evaluates the animation without running the depsgraph handlers
+        self.context.scene.frame_current = frame
+        self.obj.location[0] = self.fcurve.evaluate(frame)
+
+    def move(self, value):
+        self.obj.location[0] = value
+        magnet.anim_transform_handlers(self.context.scene)
+
+    def check_same_value_on_other_frame(self):
+        self.go_to_frame(2)
+        self.move(0.0)
+        self.assertAlmostEqual(self.fcurve.evaluate(2), 0.0, places=5)
+
+        # the channel had 0 on frame 2 too, but on frame 20 it is a change
+        self.go_to_frame(20)
+        self.assertNotAlmostEqual(self.fcurve.evaluate(20), 0.0, places=3)
+        self.move(0.0)
+        self.assertAlmostEqual(self.fcurve.evaluate(20), 0.0, places=5)
+
+    def test_same_value_on_other_frame(self):
+        self.check_same_value_on_other_frame()
+
+    def test_same_value_on_other_frame_without_numpy(self):
+        with without_numpy():
+            self.check_same_value_on_other_frame()
+
+    def test_unchanged_channel(self):
+        self.go_to_frame(6)
+        magnet.anim_transform_handlers(self.context.scene)
+        magnet.anim_transform_handlers(self.context.scene)
+
+        self.assertEqual([key.co.y for key in self.fcurve.keyframe_points][:4], [0.0, 1.0, 3.0, 2.0])
+
+    def test_forget_on_undo(self):
+        self.go_to_frame(2)
+        self.move(0.0)
+
+        magnet.forget_anim_transform()
+
+        self.assertEqual(magnet.last_values, {})
+
+
+
+class DeferredTransformTest(unittest.TestCase):
+
+    def setUp(self):
+        self.obj = make_object('Cube', [0.0, 1.0, 3.0, 2.0, 0.5, 1.5])
+        self.context = make_context([self.obj])
+        self.context.scene.animaide.anim_transform.deferred = True
+        self.fcurve = self.obj.animation_data.action.fcurves[0]
+
+        self.undo_steps = []
+        patcher = mock.patch.object(bpy.ops, 'ed', types.SimpleNamespace(undo_push=self.undo_steps.append))
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def move(self, value):
+        self.obj.location[0] = value
+        magnet.anim_transform_handlers(self.context.scene)
+
+    def test_applied_when_the_transform_ends(self):
+        transform = types.SimpleNamespace(bl_idname='TRANSFORM_OT_translate')
+        window = types.SimpleNamespace(modal_operators=[transform])
+        self.context.window_manager.windows = [window]
+
+        self.context.scene.frame_current = 2
+        self.obj.location[0] = 1.0
+        self.move(1.5)
+        self.move(2.0)
+
+        # still transforming
+        magnet.deferred_transform_timer()
+        self.assertEqual(self.fcurve.evaluate(2), 1.0)
+
+        window.modal_operators = []
+        run_timers()
+
+        self.assertAlmostEqual(self.fcurve.evaluate(2), 2.0, places=5)
+        self.assertAlmostEqual(self.fcurve.evaluate(6), 3.0, places=5)
+
+        # the transform's own undo step is the only one
+        self.assertEqual(self.undo_steps, [])
+
+    def test_live_when_the_transform_cannot_be_detected(self):
+        self.context.window_manager.windows = [types.SimpleNamespace()]
+
+        self.context.scene.frame_current = 2
+        self.obj.location[0] = 1.0
+        self.move(2.0)
+
+        self.assertAlmostEqual(self.fcurve.evaluate(2), 2.0, places=5)
+        self.assertEqual(magnet.pending_channels, {})
+
+
+class MaskTest(unittest.TestCase):
+
+    def setUp(self):
+        self.obj = make_object('Cube', [0.0] * 26)
+        self.context = make_context([self.obj])
+        self.fcurve = self.obj.animation_data.action.fcurves[0]
+
+        # weight 0 before frame 10 and after 40, 1 between 20 and 30
+        action = bpy.data.actions.new('animaide')
+        self.mask = action.fcurves.new('animaide', index=0, action_group='Magnet')
+        for frame, weight in ((10, 0.0), (20, 1.0), (30, 1.0), (40, 0.0)):
+            self.mask.keyframe_points.insert(frame, weight)
+
+    def check_mask(self):
+        self.context.scene.frame_current = 24
+        self.obj.location[0] = 1.0
+        magnet.anim_transform_handlers(self.context.scene)
+
+        values = [self.fcurve.evaluate(frame) for frame in (0, 10, 16, 24, 30, 36, 50)]
+        for value, expected in zip(values, [0.0, 0.0, 0.6, 1.0, 1.0, 0.4, 0.0]):
+            self.assertAlmostEqual(value, expected, places=5)
+
+    def test_mask(self):
+        self.check_mask()
+
+    def test_mask_without_numpy(self):
+        with without_numpy():
+            self.check_mask()
+
+    def test_weights(self):
+        magnet.compile_mask(self.mask)
+        frames = [0.0, 15.0, 25.0, 32.5, 50.0]
+        expected = [0.0, 0.5, 1.0, 0.75, 0.0]
+
+        for weight, expected_weight in zip(magnet.get_mask_weights(frames), expected):
+            self.assertAlmostEqual(weight, expected_weight)
+
+        with without_numpy():
+            magnet.compile_mask(self.mask)
+            for weight, expected_weight in zip(magnet.get_mask_weights(frames), expected):
+                self.assertAlmostEqual(weight, expected_weight)
+
+    def test_compiled_again_after_undo(self):
+        table = magnet.get_mask_table()
+        self.assertIs(magnet.get_mask_table(), table)
+
+        self.mask.keyframe_points[1].co.y = 0.5
+        magnet.forget_anim_transform()
+
+        self.assertIsNone(magnet.mask_table)
+        self.assertIsNotNone(magnet.get_mask_table())
+        self.assertAlmostEqual(magnet.get_mask_weights([20.0])[0], 0.5)
+
+    def test_removed_mask(self):
+        self.context.scene.animaide.anim_transform.use_mask = True
+        magnet.get_mask_table()
+
+        magnet.remove_anim_trans_mask()
+
+        self.assertIsNone(magnet.mask_table)
+        self.assertIsNone(magnet.get_mask_table())
+        self.assertFalse(self.context.scene.animaide.anim_transform.use_mask)
+
+
+if __name__ == '__main__':
+    unittest.main()
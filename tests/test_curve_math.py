@@ -0,0 +1,202 @@
+import types
+import unittest
+from unittest import mock
+
+from addon import animaide, np, without_numpy
+
+curve_math = animaide.curve_math
+
+neighbors = ({'x': 0.0, 'y': 1.0}, {'x': 20.0, 'y': 5.0})
+
+
+@unittest.skipIf(np is None, 'the s curve tables need numpy')
+class SCurveTableTest(unittest.TestCase):
+
+    def setUp(self):
+        curve_math.s_curve_tables.clear()
+        self.addCleanup(curve_math.s_curve_tables.clear)
+
+    def test_table_matches_formula(self):
+        x = np.linspace(-0.5, 1.5, 101)
+
+        for slope in (1.0, 2.0, 5.0, 21.0):
+            table = curve_math.get_s_curve(slope, tabulated=True)
+            for shift in (0.0, 0.3, -0.4):
+                difference = table(x, xshift=shift) - curve_math.s_curve(x, slope=slope, xshift=shift)
+                self.assertLess(np.max(np.abs(difference)), 1e-3)
+
+    def test_ease_does_not_make_tables(self):
+        x = np.linspace(1.0, 19.0, 10)
+
+        for step in range(-100, 101):
+            curve_math.ease(x, x, step / 100, *neighbors, (-1.0, 1.0), 2.0)
+
+        self.assertEqual(len(curve_math.s_curve_tables), 0)
+
+    def test_least_recently_used_table_is_dropped(self):
+        with mock.patch.object(curve_math, 'max_tables', 3):
+            first = curve_math.get_s_curve(1.0, tabulated=True)
+            curve_math.get_s_curve(2.0, tabulated=True)
+            curve_math.get_s_curve(3.0, tabulated=True)
+
+            # using the first one again keeps it when a new one is needed
+            curve_math.get_s_curve(1.0, tabulated=True)
+            curve_math.get_s_curve(4.0, tabulated=True)
+
+            self.assertEqual(list(curve_math.s_curve_tables), [3.0, 1.0, 4.0])
+            self.assertIs(curve_math.get_s_curve(1.0, tabulated=True), first)
+
+
+def make_curve(x, y, interpolation='BEZIER', handle_length=1 / 3):
+    '''
+    Arrays "evaluate" needs, with the handles of each key pointing at its neighbors
+    '''
+
+    x = np.array(x, dtype=np.float64)
+    y = np.array(y, dtype=np.float64)
+
+    previous_x = np.concatenate(([x[0] - 1], x[:-1]))
+    next_x = np.concatenate((x[1:], [x[-1] + 1]))
+    previous_y = np.concatenate(([y[0]], y[:-1]))
+    next_y = np.concatenate((y[1:], [y[-1]]))
+
+    return types.SimpleNamespace(x=x, y=y,
+                                 left_x=x - (x - previous_x) * handle_length,
+                                 left=y - (y - previous_y) * handle_length,
+                                 right_x=x + (next_x - x) * handle_length,
+                                 right=y + (next_y - y) * handle_length,
+                                 interpolation=np.full(len(x), curve_math.interpolations[interpolation]))
+
+
+@unittest.skipIf(np is None, 'evaluate needs numpy')
+class CycleFramesTest(unittest.TestCase):
+
+    def cycle(self, frames, before='NONE', after='NONE'):
+        x = np.array([0.0, 5.0, 10.0])
+        y = np.array([1.0, 3.0, 2.0])
+
+        return curve_math.cycle_frames(x, y, np.array(frames, dtype=np.float64), before, after)
+
+    def test_repeat(self):
+        frames, offset = self.cycle([-15.0, -5.0, 0.0, 4.0, 10.0, 15.0, 20.0, 25.0], 'REPEAT', 'REPEAT')
+
+        # frames on the last key and on whole periods after it are the end of a cycle
+        self.assertEqual(frames.tolist(), [5.0, 5.0, 0.0, 4.0, 10.0, 5.0, 10.0, 5.0])
+        self.assertEqual(offset.tolist(), [0.0] * 8)
+
+    def test_repeat_offset(self):
+        frames, offset = self.cycle([-5.0, 10.0, 15.0, 20.0, 25.0], 'REPEAT_OFFSET', 'REPEAT_OFFSET')
+
+        self.assertEqual(frames.tolist(), [5.0, 10.0, 5.0, 10.0, 5.0])
+        self.assertEqual(offset.tolist(), [-1.0, 0.0, 1.0, 1.0, 2.0])
+
+    def test_mirror(self):
+        frames, offset = self.cycle([-4.0, 12.0, 20.0, 24.0], 'MIRROR', 'MIRROR')
+
+        self.assertEqual(frames.tolist(), [4.0, 8.0, 0.0, 4.0])
+
+    def test_none(self):
+        frames, offset = self.cycle([-5.0, 15.0], 'NONE', 'NONE')
+
+        self.assertEqual(frames.tolist(), [-5.0, 15.0])
+
+    def test_single_key(self):
+        frames, offset = curve_math.cycle_frames(np.array([3.0]), np.array([1.0]), np.array([0.0, 7.0]),
+                                                 'REPEAT', 'REPEAT')
+
+        self.assertEqual(frames.tolist(), [0.0, 7.0])
+
+
+@unittest.skipIf(np is None, 'evaluate needs numpy')
+class EvaluateTest(unittest.TestCase):
+
+    def test_linear(self):
+        curve = make_curve([0.0, 10.0, 20.0], [0.0, 5.0, 1.0], 'LINEAR')
+        values = curve_math.evaluate(curve, [-5.0, 0.0, 2.0, 10.0, 15.0, 20.0, 30.0])
+
+        np.testing.assert_allclose(values, [0.0, 0.0, 1.0, 5.0, 3.0, 1.0, 1.0])
+
+    def test_constant(self):
+        curve = make_curve([0.0, 10.0, 20.0], [0.0, 5.0, 1.0], 'CONSTANT')
+        values = curve_math.evaluate(curve, [2.0, 9.9, 10.0, 19.0, 20.0])
+
+        np.testing.assert_allclose(values, [0.0, 0.0, 5.0, 5.0, 1.0])
+
+    def test_bezier(self):
+        # handles a third of the way to the neighbors make straight segments
+        curve = make_curve([0.0, 10.0, 20.0], [0.0, 6.0, 0.0])
+        values = curve_math.evaluate(curve, [2.5, 5.0, 12.5, 20.0])
+
+        np.testing.assert_allclose(values, [1.5, 3.0, 4.5, 0.0], atol=1e-6)
+
+    def test_bezier_flat_handles(self):
+        curve = make_curve([0.0, 10.0], [0.0, 4.0])
+        curve.left = curve.y.copy()
+        curve.right = curve.y.copy()
+
+        values = curve_math.evaluate(curve, [0.0, 2.0, 5.0, 8.0, 10.0])
+
+        self.assertAlmostEqual(values[2], 2.0)
+        # eases in and out
+        self.assertLess(values[1], 0.8)
+        self.assertGreater(values[3], 3.2)
+        self.assertEqual(values[-1], 4.0)
+
+    def test_long_handles(self):
+        # handles longer than the segment are shortened, the curve never goes back in time
+        curve = make_curve([0.0, 10.0], [0.0, 4.0], handle_length=3.0)
+        values = curve_math.evaluate(curve, np.linspace(0.0, 10.0, 41))
+
+        self.assertTrue(np.all(np.diff(values) >= -1e-6))
+
+    def test_cycles(self):
+        curve = make_curve([0.0, 10.0, 20.0], [0.0, 5.0, 1.0], 'LINEAR')
+        values = curve_math.evaluate(curve, [-10.0, 20.0, 25.0, 40.0], 'REPEAT', 'REPEAT_OFFSET')
+
+        np.testing.assert_allclose(values, [5.0, 1.0, 3.5, 2.0])
+
+    def test_one_key(self):
+        curve = make_curve([4.0], [2.5])
+
+        np.testing.assert_allclose(curve_math.evaluate(curve, [0.0, 4.0, 9.0]), [2.5, 2.5, 2.5])
+
+
+class NumbersTest(unittest.TestCase):
+    '''
+    Functions used both on numbers and on arrays give the same values
+    '''
+
+    frames = [-3.0, 0.0, 0.3, 1.7, 2.0, 8.25, 100.5]
+
+    @unittest.skipIf(np is None, 'numpy is not available')
+    def test_s_curve(self):
+        x = np.linspace(-0.5, 2.5, 31)
+
+        for slope in (1.0, 2.5, 8.0):
+            values = curve_math.s_curve(x, slope=slope, width=2, height=2, xshift=-1, yshift=-1)
+            for value, number in zip(values, x):
+                self.assertAlmostEqual(value, curve_math.s_curve(float(number), slope=slope, width=2, height=2,
+                                                                 xshift=-1, yshift=-1))
+
+    @unittest.skipIf(np is None, 'numpy is not available')
+    def test_gradient_noise(self):
+        values = curve_math.gradient_noise(self.frames, 3)
+
+        with without_numpy():
+            numbers = curve_math.gradient_noise(self.frames, 3)
+
+        np.testing.assert_allclose(values, numbers)
+
+    def test_gradient_noise_without_numpy(self):
+        frames = [frame / 10 for frame in range(-500, 500)]
+
+        with without_numpy():
+            values = curve_math.gradient_noise(frames, 7)
+
+            self.assertTrue(all(-0.5 <= value <= 0.5 for value in values))
+            self.assertEqual(values, curve_math.gradient_noise(frames, 7))
+            self.assertNotEqual(values, curve_math.gradient_noise(frames, 8))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,179 @@
+import types
+import unittest
+
+from addon import animaide, make_context, make_object, np, rigs, without_numpy
+
+key_utils = animaide.key_utils
+
+
+def select(obj, indexes):
+    fcurve = obj.animation_data.action.fcurves[0]
+
+    for index, key in enumerate(fcurve.keyframe_points):
+        key.select_control_point = index in indexes
+
+    return fcurve
+
+
+class SmoothTest(unittest.TestCase):
+
+    values = [0.0, 4.0, 2.0, 6.0, 1.0, 3.0]
+
+    def check_smooth_y(self):
+        obj = make_object('Cube', self.values)
+        make_context([obj])
+        fcurve = select(obj, (1, 2, 3))
+
+        snapshot = key_utils.FCurveSnapshot(fcurve, key_utils.get_selection(fcurve))
+
+        # the ends of the block count their own value for the neighbor that is not selected
+        expected = [(4.0 + 2.0) / 2, (4.0 + 6.0) / 2, (2.0 + 6.0) / 2]
+
+        for index, expected_value in zip((1, 2, 3), expected):
+            self.assertAlmostEqual(float(snapshot.smooth_y[index]), expected_value, places=5)
+
+    @unittest.skipIf(np is None, 'numpy is not available')
+    def test_smooth_y(self):
+        self.check_smooth_y()
+
+    def test_smooth_y_without_numpy(self):
+        with without_numpy():
+            self.check_smooth_y()
+
+
+class KeyIndexTest(unittest.TestCase):
+
+    frames = [0.0, 2.0, 4.0, 6.0, 10.0]
+
+    def check_key_index(self, x):
+        index = key_utils.KeyIndex(x)
+
+        self.assertEqual(index.search(4.0), 2)
+        self.assertEqual(index.search(4.0, side='right'), 3)
+        self.assertEqual(index.search(-1.0), 0)
+        self.assertEqual(index.search(11.0), 5)
+
+        self.assertEqual(index.key_at(6.0), 3)
+        self.assertIsNone(index.key_at(5.0))
+        self.assertIsNone(index.key_at(12.0))
+
+        self.assertEqual(index.neighbors(4.0), (1, 3))
+        self.assertEqual(index.neighbors(5.0), (2, 3))
+        self.assertEqual(index.neighbors(0.0), (None, 1))
+        self.assertEqual(index.neighbors(10.0), (3, None))
+
+        self.assertEqual(index.keys_in_range(2.0, 6.0), range(1, 4))
+        self.assertEqual(index.keys_in_range(7.0, 9.0), range(4, 4))
+
+    @unittest.skipIf(np is None, 'numpy is not available')
+    def test_key_index(self):
+        self.check_key_index(np.array(self.frames, dtype=np.float32))
+
+    def test_key_index_without_numpy(self):
+        with without_numpy():
+            self.check_key_index(self.frames)
+
+    def test_from_fcurve(self):
+        obj = make_object('Cube', [1.0] * 5, frames=self.frames)
+
+        with without_numpy():
+            index = key_utils.KeyIndex.from_fcurve(obj.animation_data.action.fcurves[0])
+
+        self.assertEqual(list(index.x), self.frames)
+
+
+def depsgraph(*ids):
+    return types.SimpleNamespace(updates=[types.SimpleNamespace(id=types.SimpleNamespace(original=id_data))
+                                          for id_data in ids])
+
+
+class SnapshotCacheTest(unittest.TestCase):
+
+    def setUp(self):
+        self.obj = make_object('Cube', [0.0, 4.0, 2.0, 6.0, 1.0, 3.0])
+        self.context = make_context([self.obj])
+        self.action = self.obj.animation_data.action
+        self.fcurve = select(self.obj, (1, 2))
+
+    def test_same_selection_reuses_snapshot(self):
+        snapshot = key_utils.get_snapshot(self.fcurve)
+
+        self.assertIs(key_utils.get_snapshot(self.fcurve), snapshot)
+
+        select(self.obj, (1, 2, 3))
+        changed = key_utils.get_snapshot(self.fcurve)
+
+        self.assertIsNot(changed, snapshot)
+        self.assertEqual(list(changed.selected_keys), [1, 2, 3])
+
+    def test_changed_action_is_forgotten(self):
+        for id_data in (self.action, self.obj):
+            snapshot = key_utils.get_snapshot(self.fcurve)
+            key_utils.forget_changed_snapshots(self.context.scene, depsgraph(id_data))
+
+            self.assertIsNot(key_utils.get_snapshot(self.fcurve), snapshot)
+
+    def test_own_updates_are_kept(self):
+        snapshot = key_utils.get_snapshot(self.fcurve)
+
+        key_utils.tag_actions(self.context, [self.action])
+        key_utils.forget_changed_snapshots(self.context.scene, depsgraph(self.action))
+
+        self.assertIs(key_utils.get_snapshot(self.fcurve), snapshot)
+        self.assertEqual(key_utils.own_updates, set())
+
+        # only the update that followed the slider is skipped
+        key_utils.forget_changed_snapshots(self.context.scene, depsgraph(self.action))
+        self.assertIsNot(key_utils.get_snapshot(self.fcurve), snapshot)
+
+    def test_other_actions_are_kept(self):
+        snapshot = key_utils.get_snapshot(self.fcurve)
+        other = make_object('Sphere', [1.0, 2.0])
+
+        key_utils.forget_changed_snapshots(self.context.scene, depsgraph(other.animation_data.action))
+
+        self.assertIs(key_utils.get_snapshot(self.fcurve), snapshot)
+
+    def test_clear_on_undo(self):
+        key_utils.get_snapshot(self.fcurve)
+        key_utils.get_channel_bone('pose.bones["Bone"].location')
+        key_utils.get_sliders_globals()
+
+        key_utils.clear_snapshots()
+
+        self.assertEqual(key_utils.snapshot_cache, {})
+        self.assertEqual(key_utils.global_values, {})
+        self.assertEqual(key_utils.bone_channels, {})
+
+
+class BoneChannelTest(unittest.TestCase):
+
+    def test_parse_channel_bone(self):
+        self.assertEqual(key_utils.parse_channel_bone('pose.bones["Arm.L"].location'), 'Arm.L')
+        self.assertEqual(key_utils.parse_channel_bone('pose.bones["Arm"]["prop"]'), 'Arm')
+        self.assertEqual(key_utils.parse_channel_bone('location'), key_utils.object_channel)
+        self.assertEqual(key_utils.parse_channel_bone('["prop"]'), key_utils.object_channel)
+
+    def test_channels_of_every_armature(self):
+        first = rigs.make_rig('First', 2, 10)
+        second = rigs.make_rig('Second', 3, 10)
+        context = make_context([first, second])
+        second.data.bones['Bone.000'].hide = True
+
+        # an fcurve of the armature object
+        first.animation_data.action.fcurves.new('location', index=0)
+
+        settings = key_utils.get_settings(context)
+
+        for obj, usable in ((first, {'Bone.000', 'Bone.001'}), (second, {'Bone.001', 'Bone.002'})):
+            polled = {key_utils.get_channel_bone(fcurve.data_path) for fcurve in obj.animation_data.action.fcurves
+                      if key_utils.poll_fcurve(settings, obj, fcurve)}
+            self.assertEqual(polled, usable)
+
+        # one item per data_path, whatever the armature or the action
+        data_paths = {fcurve.data_path for obj in (first, second) for fcurve in obj.animation_data.action.fcurves}
+        self.assertEqual(set(key_utils.bone_channels), data_paths)
+
+
+if __name__ == '__main__':
+    unittest.main()
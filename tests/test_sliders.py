@@ -0,0 +1,201 @@
+import types
+import unittest
+from unittest import mock
+
+from addon import (animaide, assert_keys_equal, bpy, get_keys, make_context, make_object, np, rigs, run_timers,
+                   without_numpy)
+
+ops = animaide.ops
+slider_tools = animaide.slider_tools
+
+
+class EaseOperator(ops.AAT_OT):
+    bl_label = 'Ease'
+    slider_type = 'EASE'
+
+    def __init__(self, op_context='INVOKE_DEFAULT', factor=0.0):
+        ops.AAT_OT.__init__(self)
+        self.slope = 2.0
+        self.factor = factor
+        self.slot_index = -1
+        self.op_context = op_context
+
+
+def event(type, mouse_x=0):
+    return types.SimpleNamespace(type=type, mouse_x=mouse_x)
+
+
+class SlicedCommitTest(unittest.TestCase):
+
+    def setUp(self):
+        patcher = mock.patch.object(slider_tools, 'min_sliced_fcurves', 1)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+        self.undo_steps = []
+        patcher = mock.patch.object(bpy.ops, 'ed', types.SimpleNamespace(undo_push=self.undo_push))
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+        self.make_scene()
+
+    def make_scene(self, sliced_commit=True):
+        self.obj = rigs.make_object('Cube', key_count=40)
+        self.context = make_context([self.obj])
+
+        slider = self.context.scene.animaide.slider
+        slider.sliced_commit = sliced_commit
+        slider.update_on_release = True
+
+    def undo_push(self, message=''):
+        self.undo_steps.append(message)
+
+    def expected_keys(self, factor):
+        self.make_scene(sliced_commit=False)
+        EaseOperator('EXEC_DEFAULT', factor).execute(self.context)
+        keys = get_keys(self.obj)
+
+        self.make_scene()
+
+        return keys
+
+    def test_release_adds_one_undo_step(self):
+        operator = EaseOperator()
+
+        self.assertEqual(operator.invoke(self.context, event('NONE')), {'RUNNING_MODAL'})
+        operator.modal(self.context, event('MOUSEMOVE', 60))
+        operator.modal(self.context, event('TIMER'))
+
+        # the operator doesn't add a step with the keys half applied
+        self.assertEqual(operator.modal(self.context, event('LEFTMOUSE')), {'CANCELLED'})
+        self.assertEqual(self.undo_steps, [])
+
+        run_timers()
+
+        self.assertEqual(self.undo_steps, ['Ease'])
+        self.assertIsNone(slider_tools.pending_commit)
+
+    def test_exec_adds_one_undo_step(self):
+        expected = self.expected_keys(0.6)
+
+        self.assertEqual(EaseOperator('EXEC_DEFAULT', 0.6).execute(self.context), {'CANCELLED'})
+        self.assertEqual(self.undo_steps, [])
+
+        run_timers()
+
+        self.assertEqual(self.undo_steps, ['Ease'])
+        assert_keys_equal(self, get_keys(self.obj), expected)
+
+
+original_values = [0, 4, 2, 6, 1, 3, 5, 2, 7, 0]
+
+
+def run_slider(slider_type, factor=0.6, view=None):
+    '''
+    Values of the keys after one tick of the slider, with keys 1 to 8 selected. While previewing,
+    "view" is the first and last frame in view
+    '''
+
+    obj = make_object('Cube', original_values)
+    context = make_context([obj])
+
+    for key in obj.animation_data.action.fcurves[0].keyframe_points[1:9]:
+        key.select_control_point = True
+
+    operator = types.SimpleNamespace(slider_type=slider_type, slot_index=-1, op_context='INVOKE_DEFAULT',
+                                     factor=factor, slope=2.0, plan=None, preview_plan=None,
+                                     defer_update=False, settings=None)
+    slider_tools.looper(operator, context)
+
+    if view is not None:
+        slider_tools.restore_plan(operator.plan)
+        operator.preview_plan = slider_tools.get_visible_plan(operator.plan, *view)
+        slider_tools.looper(operator, context)
+
+    return [key.co.y for key in obj.animation_data.action.fcurves[0].keyframe_points]
+
+
+class KeyByKeyTest(unittest.TestCase):
+    '''
+    The sliders key by key give the same keys as the ones on arrays
+    '''
+
+    @unittest.skipIf(np is None, 'numpy is not available')
+    def test_same_keys(self):
+        for slider_type in slider_tools.sliders:
+            for factor in (-0.6, 0.3, 0.9):
+                with self.subTest(slider_type, factor=factor):
+                    expected = run_slider(slider_type, factor)
+
+                    with without_numpy():
+                        values = run_slider(slider_type, factor)
+
+                    for value, expected_value in zip(values, expected):
+                        self.assertAlmostEqual(value, expected_value, places=4)
+
+
+class PreviewTest(unittest.TestCase):
+    '''
+    While previewing only the keys in view change, and they get the values of a full run
+    '''
+
+    def check_preview(self):
+        for slider_type in slider_tools.sliders:
+            with self.subTest(slider_type):
+                applied = run_slider(slider_type)
+                # keys 3 to 6 in view
+                previewed = run_slider(slider_type, view=(5.5, 12.5))
+
+                for index, value in enumerate(previewed):
+                    expected = applied[index] if 3 <= index <= 6 else original_values[index]
+                    self.assertAlmostEqual(value, expected, places=5)
+
+    @unittest.skipIf(np is None, 'numpy is not available')
+    def test_preview(self):
+        self.check_preview()
+
+    def test_preview_without_numpy(self):
+        with without_numpy():
+            self.check_preview()
+
+
+class CancelTest(unittest.TestCase):
+
+    def setUp(self):
+        self.obj = rigs.make_object('Cube', key_count=40)
+        self.context = make_context([self.obj])
+
+        # only the location fcurves have selected keys
+        for fcurve in self.obj.animation_data.action.fcurves:
+            if fcurve.data_path != 'location':
+                for key in fcurve.keyframe_points:
+                    key.select_control_point = False
+
+    def check_cancel(self, update_on_release):
+        self.context.scene.animaide.slider.update_on_release = update_on_release
+        before = get_keys(self.obj)
+
+        operator = EaseOperator()
+        operator.invoke(self.context, event('NONE'))
+        operator.modal(self.context, event('MOUSEMOVE', 60))
+        operator.modal(self.context, event('TIMER'))
+        self.assertNotEqual(get_keys(self.obj), before)
+
+        key_utils = animaide.key_utils
+        with mock.patch.object(key_utils, 'update_fcurve', wraps=key_utils.update_fcurve) as update_fcurve:
+            self.assertEqual(operator.modal(self.context, event('ESC')), {'CANCELLED'})
+
+        assert_keys_equal(self, get_keys(self.obj), before)
+
+        return [call.args[0] for call in update_fcurve.call_args_list]
+
+    def test_cancel_updates_only_the_changed_fcurves(self):
+        updated = self.check_cancel(False)
+        self.assertEqual(sorted(fcurve.data_path for fcurve in updated), ['location'] * 3)
+
+    def test_cancel_on_release_updates_nothing(self):
+        self.assertEqual(self.check_cancel(True), [])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -1,5 +1,5 @@
 import bpy
-from . import props, key_utils, magnet
+from . import props, slider_tools, magnet, profiler
 from bpy.types import Panel, Menu
 
 
@@ -158,11 +158,15 @@ class AAT_PT_sliders(Panel):
         slots = animaide.slider_slots
         slider = animaide.slider
 
-        if key_utils.global_values == {}:
-            key_utils.get_sliders_globals()
-
         layout = self.layout
 
+        # Progress of a slider applied in the background
+        commit = slider_tools.pending_commit
+        if commit is not None:
+            row = layout.row(align=True)
+            row.label(text='%s: %d%%' % (commit.label, commit.progress * 100))
+            row.operator('animaide.cancel_commit', text='', icon='CANCEL')
+
         # Adds slider tool to the panel
         slider_box(layout, slider)
 
@@ -214,14 +218,13 @@ class AAT_PT_anim_transform(Panel):
 
             row = layout.row(align=True)
 
-            # if animaide.anim_transform.use_mask is False:
-            if magnet.anim_trans_mask_handlers not in bpy.app.handlers.depsgraph_update_pre:
+            if not animaide.anim_transform.use_mask or magnet.get_mask_curve() is None:
 
                 # Buttons when mask is unactive
                 row.operator("animaide.create_anim_trans_mask", text="Add Mask", icon='SELECT_SUBTRACT')
                 row.operator('animaide.anim_transform_settings', text='', icon='SETTINGS', emboss=True)
 
-            elif 'animaide' in bpy.data.actions and bpy.data.actions['animaide'].fcurves.items() != []:
+            else:
 
                 # Buttons when mask is active
                 row.operator("animaide.delete_anim_trans_mask", text="Remove Mask", icon='TRASH')
@@ -241,10 +244,43 @@ class AAT_PT_anim_transform(Panel):
                 row.prop(animaide.anim_transform, 'mask_blend_l', text='Blend', slider=False)
                 row.prop(animaide.anim_transform, 'mask_blend_r', text='Blend', slider=False)
 
-            else:
-                bpy.app.handlers.depsgraph_update_pre.remove(magnet.anim_trans_mask_handlers)
-                magnet.remove_anim_trans_mask()
-                bpy.data.window_managers['WinMan'].update_tag()
+
+class AAT_PT_profiler(Panel):
+    bl_idname = 'AAT_PT_profiler'
+    bl_label = "Profiler"
+    bl_space_type = 'GRAPH_EDITOR'
+    bl_region_type = 'UI'
+    bl_category = 'AnimAide'
+    bl_options = {'DEFAULT_CLOSED'}
+
+    def draw(self, context):
+        layout = self.layout
+
+        row = layout.row(align=True)
+
+        if profiler.enabled:
+            row.operator("animaide.profiler_toggle", text='Stop', icon='PAUSE')
+        else:
+            row.operator("animaide.profiler_toggle", text='Start', icon='PLAY')
+
+        row.operator("animaide.profiler_reset", text='', icon='X')
+        row.operator("animaide.profiler_dump", text='', icon='EXPORT')
+
+        report = profiler.get_report()
+
+        if not report:
+            layout.label(text='No timings yet')
+            return
+
+        # slowest functions first
+        for name, stat in report:
+            box = layout.box()
+            col = box.column(align=True)
+            col.label(text='%s  (%d calls)' % (name, stat['calls']), translate=False)
+            col.label(text='mean %.2f  p90 %.2f  p99 %.2f ms'
+                      % (stat['mean_ms'], stat['p90_ms'], stat['p99_ms']), translate=False)
+            if stat['fcurves']:
+                col.label(text='%d fcurves, %d keys' % (stat['fcurves'], stat['keys']), translate=False)
 
 
 class AAT_MT_pie_menu_a(Menu):
@@ -356,6 +392,7 @@ class ANIMAIDE_MT_operators(Menu):
 classes = (
     AAT_PT_sliders,
     AAT_PT_anim_transform,
+    AAT_PT_profiler,
     AAT_MT_pie_menu_a,
     AAT_MT_pie_menu_b,
     ANIMAIDE_MT_operators,
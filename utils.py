@@ -1,6 +1,3 @@
-import bpy
-
-
 def gradual(key_y, target_y, delta=1.0, factor=0.15):
     """
     Gradualy transition the value of key_y to target_y
@@ -96,14 +93,3 @@ def toggle(to_toggle, value_a, value_b):
     elif to_toggle == value_b:
         return value_a
 
-
-def update_keyframe_points(context):
-    """# The select operator(s) are bugged, and can fail to update selected keys(irmitya)"""
-    area = context.area.type
-    if area != 'GRAPH_EDITOR':
-        context.area.type = 'GRAPH_EDITOR'
-
-    bpy.ops.transform.transform()
-
-    if area != 'GRAPH_EDITOR':
-        context.area.type = area